@@ -0,0 +1,373 @@
+"""
+EU Battery Passport - vectorized registry engine.
+
+Builds and serves the battery passport registry without per-serial Python
+loops so the same code path works for the 1,000-row demo and a multi-million
+serial EU registry.
+"""
+
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+
+from dtype_policy import compact_dtypes
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REGISTRY DOMAIN CONSTANTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+CHEMISTRIES = ["NMC 811", "NMC 622", "LFP"]
+LOCATIONS = ["Customer", "Retailer", "Warehouse-US", "Warehouse-EU", "Warehouse-APAC", "Quarantine", "Recycling"]
+REGIONS = ["North America", "EMEA", "APAC", "LATAM"]
+BATTERY_SIZES = [320, 400, 500, 700, 710, 840]
+SERIAL_PREFIXES = ["NMC", "LFP"]
+
+PRODUCTION_START = "2019-01-01"
+PRODUCTION_SPAN_DAYS = 365 * 5
+WARRANTY_DAYS = 730  # 2 year warranty
+MAX_CYCLES = 1200
+
+# Columns charted by the EU Battery Passport overview tabs
+OVERVIEW_COLUMNS = ["region", "production_date", "state_of_health", "status", "location", "chemistry", "recycled_content_pct"]
+
+PASSPORT_STORE_DIR = Path(__file__).parent / ".passport_store"
+STORE_FORMAT_VERSION = 3
+
+# SoH bands: (upper bound, status, candidate locations, probabilities)
+SOH_BANDS = [
+    (70, "End-of-Life", ["Quarantine", "Recycling"], [0.3, 0.7]),
+    (80, "Degraded", ["Customer", "Retailer", "Quarantine"], [0.5, 0.3, 0.2]),
+    (np.inf, "Healthy", ["Customer", "Retailer", "Warehouse-US", "Warehouse-EU", "Warehouse-APAC"], [0.6, 0.15, 0.1, 0.1, 0.05]),
+]
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# VECTORIZED GENERATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _sample_locations(rng, soh):
+    """Draw a location code per battery from the probability table of its SoH band."""
+    band = np.searchsorted([upper for upper, _, _, _ in SOH_BANDS], soh, side="right")
+    codes = np.empty(len(soh), dtype=np.int8)
+    u = rng.random(len(soh))
+
+    for band_idx, (_, _, options, probs) in enumerate(SOH_BANDS):
+        mask = band == band_idx
+        option_codes = np.array([LOCATIONS.index(o) for o in options], dtype=np.int8)
+        picks = np.searchsorted(np.cumsum(probs), u[mask], side="right")
+        codes[mask] = option_codes[np.minimum(picks, len(options) - 1)]
+
+    return band, codes
+
+
+def generate_battery_table(n=1000, seed=42, as_of=None):
+    """Generate the battery passport table from NumPy arrays in a single pass."""
+    rng = np.random.default_rng(seed)
+    today = np.datetime64(as_of or datetime.now(), "D")
+
+    # Production dates over 5 years and age in days
+    prod_dates = np.datetime64(PRODUCTION_START, "D") + rng.integers(0, PRODUCTION_SPAN_DAYS + 1, n)
+    age_days = (today - prod_dates).astype(np.int64)
+
+    # Cycles grow with age; SoH degrades ~0.05% per cycle with some variance
+    cycles = np.minimum((rng.exponential(150, n) + age_days * 0.05).astype(np.int64), MAX_CYCLES)
+    soh = np.clip(100 - cycles * 0.05 - rng.normal(0, 3, n), 40, 100).round(1)
+
+    band, location_codes = _sample_locations(rng, soh)
+    statuses = np.array([status for _, status, _, _ in SOH_BANDS])
+
+    sizes = np.array(BATTERY_SIZES)
+    serial_numbers = np.char.add(
+        np.char.add("BATT-", np.array(SERIAL_PREFIXES)[rng.integers(0, len(SERIAL_PREFIXES), n)]),
+        np.char.add("-", (np.arange(n) + 1000).astype(str)),
+    )
+
+    return compact_dtypes(pd.DataFrame({
+        "serial_number": serial_numbers,
+        "capacity_wh": sizes[rng.integers(0, len(sizes), n)],
+        "chemistry": np.array(CHEMISTRIES)[rng.integers(0, len(CHEMISTRIES), n)],
+        "production_date": np.datetime_as_string(prod_dates, unit="D"),
+        "state_of_health": soh,
+        "charge_cycles": cycles,
+        "location": np.array(LOCATIONS)[location_codes],
+        "region": np.array(REGIONS)[rng.integers(0, len(REGIONS), n)],
+        "status": statuses[band],
+        "warranty_expires": np.datetime_as_string(prod_dates + WARRANTY_DAYS, unit="D"),
+        "co2_footprint_kg": (rng.uniform(60, 120, n) * (sizes[rng.integers(0, len(sizes), n)] / 500)).round(1),
+        "recycled_content_pct": rng.uniform(5, 25, n).round(1),
+    }))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# COLUMNAR PASSPORT STORE (ARROW IPC, PARTITIONED BY REGION)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _partition_file(path, region):
+    return Path(path) / f"region={region}" / "part-0.arrow"
+
+
+def write_passport_store(df, path):
+    """Write the registry as one uncompressed Arrow IPC file per region plus a manifest."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Private staging directory per writer, so concurrent builders never touch each other's files
+    staging = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}.staging-"))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    regions = sorted(df["region"].unique())
+    for region in regions:
+        part = table.filter(pc.equal(table["region"], region))
+        target = _partition_file(staging, region)
+        target.parent.mkdir(parents=True)
+        with pa.OSFile(str(target), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(part)
+
+    manifest = {"format_version": STORE_FORMAT_VERSION, "rows": len(df), "regions": regions, "columns": list(df.columns)}
+    (staging / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    # Readers see the old store, no store (for the instant between the two renames) or the
+    # finished new one - never a partial write. A directory rename cannot replace a non-empty
+    # directory, so the old store is moved aside first and deleted only once the new one is in.
+    retired = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}.retired-"))
+    try:
+        if path.exists():
+            path.rename(retired / "store")
+        staging.rename(path)
+    except OSError:
+        # Another writer swapped its finished store in first; keep it and drop ours
+        shutil.rmtree(staging, ignore_errors=True)
+    finally:
+        shutil.rmtree(retired, ignore_errors=True)
+    return path
+
+
+def read_passport_manifest(path):
+    """Return the store manifest, or None if the store is missing or from an older format."""
+    manifest_file = Path(path) / "manifest.json"
+    if not manifest_file.exists():
+        return None
+    manifest = json.loads(manifest_file.read_text())
+    return manifest if manifest.get("format_version") == STORE_FORMAT_VERSION else None
+
+
+def ensure_passport_store(n=1000, seed=42, as_of=None, root=PASSPORT_STORE_DIR):
+    """Build the on-disk store for (n, seed) as of one day once and return its path on every later call.
+
+    Ages, warranty expiry and status are fixed at build time, so the store is
+    keyed by its `as_of` day (default today) and earlier days' stores for the
+    same (n, seed) are removed when a new one is built.
+    """
+    day = np.datetime64(as_of or datetime.now(), "D")
+    path = Path(root) / f"n{n}-seed{seed}-{day}"
+    if read_passport_manifest(path) is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_passport_store(generate_battery_table(n, seed=seed, as_of=day), path)
+        for stale in [path.parent / f"n{n}-seed{seed}", *path.parent.glob(f"n{n}-seed{seed}-*")]:
+            if stale != path and stale.is_dir():
+                shutil.rmtree(stale, ignore_errors=True)
+    return path
+
+
+def read_passport_store(path, columns=None, regions=None):
+    """Memory-map the region partitions and return only the requested columns as a DataFrame.
+
+    Arrow IPC files are read zero-copy from the mapping, so untouched columns and
+    unselected regions are never paged in from disk.
+    """
+    manifest = read_passport_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"No battery passport store at {path}")
+
+    wanted = manifest["regions"] if regions is None else [r for r in manifest["regions"] if r in set(regions)]
+    columns = manifest["columns"] if columns is None else list(columns)
+
+    tables = []
+    for region in wanted:
+        with pa.memory_map(str(_partition_file(path, region)), "r") as source:
+            tables.append(pa.ipc.open_file(source).read_all().select(columns))
+
+    if not tables:
+        return pd.DataFrame({col: pd.Series(dtype="object") for col in columns})
+    return pa.concat_tables(tables).to_pandas()
+
+
+def take_passport_rows(path, positions, columns=None):
+    """Rows at registry `positions` (as SerialIndex returns them), in that order.
+
+    Positions count across region partitions in manifest order, the order
+    read_passport_store concatenates them in. Only the requested rows are
+    gathered from the memory-mapped partitions they fall in.
+    """
+    manifest = read_passport_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"No battery passport store at {path}")
+
+    positions = np.asarray(positions, dtype=np.int64)
+    columns = manifest["columns"] if columns is None else list(columns)
+    order, tables = [], []
+    offset = 0
+    for region in manifest["regions"]:
+        with pa.memory_map(str(_partition_file(path, region)), "r") as source:
+            part = pa.ipc.open_file(source).read_all()
+        hit = np.flatnonzero((positions >= offset) & (positions < offset + part.num_rows))
+        if len(hit):
+            order.append(hit)
+            tables.append(part.select(columns).take(positions[hit] - offset))
+        offset += part.num_rows
+
+    if not tables:
+        return read_passport_store(path, columns=columns, regions=[]).iloc[:0]
+    rows = pa.concat_tables(tables).to_pandas()
+    return rows.iloc[np.argsort(np.concatenate(order), kind="stable")].reset_index(drop=True)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SERIAL NUMBER INDEX
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class SerialIndex:
+    """Exact, prefix and capped partial lookups over the registry's serial numbers.
+
+    Build once per dataset version; lookups return row positions into the frame
+    the index was built from. Matching is case-insensitive. With `regions`
+    (one label per row), searches can be restricted to a set of regions
+    before the result cap is applied.
+    """
+
+    SCAN_CHUNK = 250_000
+
+    def __init__(self, serial_numbers, regions=None):
+        keys = pd.Series(serial_numbers, copy=False).str.upper()
+        self._hash = pd.Index(keys)
+        self._hash.get_indexer_for([""])  # build the hash table now, not on the first lookup
+        self._keys = keys.to_numpy(dtype="S")
+        self._order = np.argsort(self._keys, kind="stable")
+        self._sorted = self._keys[self._order]
+        self._regions = None if regions is None else pd.Categorical(regions)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _region_filter(self, regions):
+        """Row positions -> in-region mask function, or None when searches are unrestricted."""
+        if regions is None:
+            return None
+        if self._regions is None:
+            raise ValueError("index was built without regions")
+        wanted = np.isin(np.arange(len(self._regions.categories)), self._regions.categories.get_indexer(list(regions)))
+        codes = self._regions.codes
+        return lambda positions: positions[wanted[codes[positions]]]
+
+    def exact(self, serial, regions=None):
+        """Row positions whose serial equals `serial`."""
+        positions = self._hash.get_indexer_for([serial.strip().upper()])
+        positions = positions[positions >= 0]
+        keep = self._region_filter(regions)
+        return positions if keep is None else keep(positions)
+
+    def lookup_many(self, serials):
+        """Row position for each serial in `serials`, -1 where it is not in the registry."""
+        keys = pd.Series(serials, copy=False).str.strip().str.upper()
+        return self._hash.get_indexer_for(keys)
+
+    def prefix(self, prefix, limit=50, regions=None):
+        """Row positions whose serial starts with `prefix`, in serial order."""
+        key = prefix.strip().upper().encode()
+        lo = np.searchsorted(self._sorted, key, side="left")
+        hi = np.searchsorted(self._sorted, key + b"\xff", side="left")
+        keep = self._region_filter(regions)
+        if keep is None:
+            return self._order[lo:min(hi, lo + limit)]
+        hits, found = [], 0
+        for start in range(lo, hi, self.SCAN_CHUNK):
+            hits.append(keep(self._order[start:min(hi, start + self.SCAN_CHUNK)])[:limit - found])
+            found += len(hits[-1])
+            if found >= limit:
+                break
+        return np.concatenate(hits) if hits else np.array([], dtype=np.int64)
+
+    def contains(self, fragment, limit=50, regions=None):
+        """Row positions whose serial contains `fragment`, stopping once `limit` hits are found."""
+        key = fragment.strip().upper().encode()
+        keep = self._region_filter(regions)
+        hits = []
+        found = 0
+        for start in range(0, len(self._keys), self.SCAN_CHUNK):
+            chunk_hits = np.flatnonzero(np.char.find(self._keys[start:start + self.SCAN_CHUNK], key) >= 0) + start
+            if keep is not None:
+                chunk_hits = keep(chunk_hits)
+            hits.append(chunk_hits[:limit - found])
+            found += len(hits[-1])
+            if found >= limit:
+                break
+        return np.concatenate(hits) if hits else np.array([], dtype=np.int64)
+
+    def search(self, query, limit=50, regions=None):
+        """Exact match first, then starts-with, then partial match, capped at `limit` rows.
+
+        With `regions`, only rows in those regions count toward any stage or the cap.
+        """
+        if not query.strip():
+            return np.array([], dtype=np.int64)
+        positions = self.exact(query, regions)
+        if not len(positions):
+            positions = self.prefix(query, limit, regions)
+        if not len(positions):
+            positions = self.contains(query, limit, regions)
+        return positions[:limit]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BULK TRACE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+SERIAL_COLUMN_NAMES = ["serial_number", "serial", "serial_no", "battery_serial"]
+
+
+def read_serial_list(source):
+    """Read an uploaded serial list (CSV or one serial per line) into a string Series; empty when the file is blank."""
+    try:
+        df = pd.read_csv(source, dtype=str, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return pd.Series([], dtype=str, name="requested_serial")
+    lowered = {col.strip().lower(): col for col in df.columns}
+    column = next((lowered[name] for name in SERIAL_COLUMN_NAMES if name in lowered), None)
+
+    if column is None:
+        # Headerless single-column file: the "header" is itself the first serial
+        serials = pd.concat([pd.Series([df.columns[0]]), df.iloc[:, 0]], ignore_index=True)
+    else:
+        serials = df[column]
+    serials = serials.str.strip()
+    return serials[serials != ""].reset_index(drop=True).rename("requested_serial")
+
+
+def bulk_trace(passport, serial_index, serials):
+    """Resolve a list of serials against the registry in one vectorized hash join.
+
+    `passport` is the registry frame the index was built from, or the path of
+    its passport store, in which case only the matched rows are read.
+    Returns one row per requested serial, in upload order, with a
+    `trace_status` of MATCHED or NOT FOUND and the passport columns filled
+    for matches.
+    """
+    positions = serial_index.lookup_many(serials)
+    matched = positions >= 0
+
+    if isinstance(passport, pd.DataFrame):
+        rows = passport.iloc[positions[matched]]
+    else:
+        rows = take_passport_rows(passport, positions[matched])
+    result = rows.set_axis(np.flatnonzero(matched)).reindex(np.arange(len(positions)))
+    # Misses introduce NaN; keep integer columns integral in the exported file
+    result = result.astype(dict.fromkeys(rows.select_dtypes("integer").columns, "Int64"))
+    result.insert(0, "trace_status", np.where(matched, "MATCHED", "NOT FOUND"))
+    result.insert(0, "requested_serial", pd.Series(serials).to_numpy())
+    return result
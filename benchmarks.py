@@ -0,0 +1,1234 @@
+"""
+Service Command performance benchmarks.
+
+Run from the app directory, e.g.:
+
+    python benchmarks.py battery-gen --sizes 1000000 10000000
+"""
+
+import argparse
+import copy
+import io
+import os
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from battery_passport import (
+    OVERVIEW_COLUMNS,
+    SerialIndex,
+    bulk_trace,
+    ensure_passport_store,
+    generate_battery_table,
+    read_passport_store,
+    read_serial_list,
+)
+from dtype_policy import bytes_per_row, compact_dtypes
+from filter_engine import PartitionedFrame
+from fleet_liability import FleetLiability
+from hts_schedule import TariffSchedule, build_hts_schedule, build_shipment_ledger, schedule_lines
+from landed_cost import LandedCostGrid, cost_breakdown
+from load_planning import plan_loads, unit_volume_m3
+from ltb_engine import batch_last_time_buy, optimize_last_time_buy, sku_ltb_inputs
+from modal_breakeven import modal_breakeven, modal_costs, modal_lanes
+from network_flow import NetworkFlow
+from obligations import MARKET_JURISDICTIONS, ObligationIndex
+from parts_inventory import SEED_PARTS, build_parts_inventory, expand_parts_catalog
+from routing import RouteTable, pareto_routes
+from sensitivity import SCALE_GRID, SHAPE_GRID, SensitivitySurface
+from service_network import build_dealer_network, build_install_base
+from sourcing import optimize_sourcing, supplier_sources
+from tariff_engine import annual_value_by_code, scenario_duty, scenario_hash, simulate_tariff_paths, tariff_codes
+from time_window import EventLog, dealer_claim_events, dealer_window_metrics
+from weibull_fit import build_field_history, fit_weibull
+
+
+def _timed(fn, *args, **kwargs):
+    """Run fn once and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _best_of(repeats, fn, *args):
+    """Fastest of `repeats` runs of fn, in seconds."""
+    return min(_timed(fn, *args)[1] for _ in range(repeats))
+
+
+def _print_table(title, rows):
+    print(f"\n{title}")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BATTERY PASSPORT GENERATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _legacy_battery_rows(n):
+    """The original per-row generator loop, kept only as the benchmark baseline."""
+    base_date = datetime(2019, 1, 1)
+    sizes = [320, 400, 500, 700, 710, 840]
+    batteries = []
+    for i in range(n):
+        prod_date = base_date + timedelta(days=random.randint(0, 365 * 5))
+        age_days = (datetime.now() - prod_date).days
+        cycles = min(int(np.random.exponential(150) + age_days * 0.05), 1200)
+        soh = max(min(100 - (cycles * 0.05) - np.random.normal(0, 3), 100), 40)
+        if soh < 70:
+            location = np.random.choice(["Quarantine", "Recycling"], p=[0.3, 0.7])
+        elif soh < 80:
+            location = np.random.choice(["Customer", "Retailer", "Quarantine"], p=[0.5, 0.3, 0.2])
+        else:
+            location = np.random.choice(["Customer", "Retailer", "Warehouse-US", "Warehouse-EU", "Warehouse-APAC"], p=[0.6, 0.15, 0.1, 0.1, 0.05])
+        batteries.append({
+            "serial_number": f"BATT-{random.choice(['NMC', 'LFP'])}-{str(i+1000).zfill(4)}",
+            "capacity_wh": random.choice(sizes),
+            "production_date": prod_date.strftime("%Y-%m-%d"),
+            "state_of_health": round(soh, 1),
+            "charge_cycles": cycles,
+            "location": location,
+            "warranty_expires": (prod_date + timedelta(days=730)).strftime("%Y-%m-%d"),
+            "co2_footprint_kg": round(random.uniform(60, 120) * (random.choice(sizes) / 500), 1),
+        })
+    return pd.DataFrame(batteries)
+
+
+def bench_battery_generation(sizes, legacy_rows):
+    rows = []
+    if legacy_rows:
+        _, elapsed = _timed(_legacy_battery_rows, legacy_rows)
+        rows.append({"path": "legacy loop", "rows": legacy_rows, "seconds": round(elapsed, 2), "rows_per_sec": f"{legacy_rows / elapsed:,.0f}", "MB": None})
+    for n in sizes:
+        df, elapsed = _timed(generate_battery_table, n)
+        rows.append({
+            "path": "vectorized",
+            "rows": n,
+            "seconds": round(elapsed, 2),
+            "rows_per_sec": f"{n / elapsed:,.0f}",
+            "MB": round(df.memory_usage(deep=True).sum() / 1e6, 1),
+        })
+        del df
+    _print_table("Battery passport generation", rows)
+
+
+def bench_passport_store(sizes):
+    rows = []
+    with tempfile.TemporaryDirectory() as root:
+        for n in sizes:
+            _, build = _timed(ensure_passport_store, n, root=root)
+            path, _ = _timed(ensure_passport_store, n, root=root)
+            _, overview = _timed(read_passport_store, path, columns=OVERVIEW_COLUMNS)
+            _, one_col = _timed(read_passport_store, path, columns=["status"], regions=["EMEA"])
+            _, full = _timed(read_passport_store, path)
+            rows.append({
+                "rows": n,
+                "build_s": round(build, 2),
+                "overview_ms": round(overview * 1000, 1),
+                "status_emea_ms": round(one_col * 1000, 1),
+                "full_ms": round(full * 1000, 1),
+            })
+    _print_table("Battery passport store reads (memory-mapped Arrow IPC)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BATTERY TRACE LOOKUP
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_serial_lookup(n, repeats):
+    serials = generate_battery_table(n)["serial_number"]
+    index, build = _timed(SerialIndex, serials)
+    target = serials.iloc[n // 2]
+    queries = [("exact", target), ("exact, lower-case", target.lower()), ("prefix", target[:-2]), ("partial", target[-4:])]
+
+    rows = []
+    for label, query in queries:
+        scan = _best_of(repeats, lambda q: serials.str.contains(q, case=False), query)
+        indexed = _best_of(repeats, index.search, query)
+        rows.append({
+            "query": label,
+            "text": query,
+            "str.contains_ms": round(scan * 1000, 2),
+            "index_ms": round(indexed * 1000, 3),
+            "speedup": f"{scan / indexed:,.0f}x",
+        })
+    _print_table(f"Serial lookup over {n:,} rows (index build {build:.2f}s)", rows)
+
+
+def bench_bulk_trace(registry_rows, batch_sizes, miss_rate):
+    passport = generate_battery_table(registry_rows)
+    index = SerialIndex(passport["serial_number"])
+    rng = np.random.default_rng(7)
+
+    rows = []
+    for batch in batch_sizes:
+        n_miss = int(batch * miss_rate)
+        hits = passport["serial_number"].to_numpy()[rng.integers(0, registry_rows, batch - n_miss)]
+        upload = "serial_number\n" + "\n".join([*hits, *(f"BATT-UNK-{i}" for i in range(n_miss))])
+
+        serials, parse = _timed(read_serial_list, io.StringIO(upload))
+        result, join = _timed(bulk_trace, passport, index, serials)
+        _, export = _timed(result.to_csv, index=False, float_format="%.7g")
+        rows.append({
+            "serials": batch,
+            "parse_ms": round(parse * 1000, 1),
+            "join_ms": round(join * 1000, 1),
+            "csv_ms": round(export * 1000, 1),
+            "serials_per_sec": f"{batch / (parse + join):,.0f}",
+        })
+    _print_table(f"Bulk trace against {registry_rows:,} passports ({miss_rate:.0%} misses)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PARTS INVENTORY BUILDER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BENCH_TARIFF_RATES = {"taiwan_parts": 15.5, "china_parts": 30.5, "china_batteries": 28.4, "vietnam_parts": 0.0, "germany_motors": 0.0, "japan_motors": 0.0}
+
+
+def _legacy_parts_columns(df):
+    """The original per-row `df.apply` derivations, kept only as the benchmark baseline."""
+    df = df.copy()
+    df["on_hand_slc"] = df.apply(lambda x: np.random.randint(200, 800) if x.get("legacy_support") else np.random.randint(50, 400), axis=1)
+    df["on_hand_reno"] = df.apply(lambda x: np.random.randint(100, 500) if x.get("legacy_support") else np.random.randint(30, 250), axis=1)
+    df["on_hand_eu"] = df.apply(lambda x: np.random.randint(150, 600) if x.get("legacy_support") else np.random.randint(40, 300), axis=1)
+    df["tariff_rate_pct"] = df["tariff_code"].apply(lambda x: BENCH_TARIFF_RATES.get(x, 0))
+    return df
+
+
+def bench_parts_inventory(sizes, legacy_max):
+    rows = []
+    for n in sizes:
+        catalog, expand = _timed(expand_parts_catalog, SEED_PARTS, n)
+        _, build = _timed(build_parts_inventory, catalog, BENCH_TARIFF_RATES)
+        legacy = _timed(_legacy_parts_columns, catalog)[1] if n <= legacy_max else None
+        rows.append({
+            "skus": n,
+            "expand_ms": round(expand * 1000, 1),
+            "vectorized_ms": round(build * 1000, 1),
+            "apply_ms": round(legacy * 1000, 1) if legacy else None,
+            "speedup": f"{legacy / build:,.0f}x" if legacy else None,
+        })
+    _print_table("Parts inventory builder (all derived columns)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SHARED DATASET CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _session_views(datasets, shared):
+    """What one session holds after a rerun: its dataset frames plus the copy-on-write edit sites."""
+    if shared:
+        frames = dict(datasets)
+    else:
+        # st.cache_data hands every caller an unpickled copy
+        frames = {name: pickle.loads(blob) for name, blob in datasets.items()}
+    parts_chart = frames["parts"].copy(deep=False)
+    parts_chart["total_stock"] = parts_chart["total_on_hand"]
+    heatmap_data = frames["batteries"].copy(deep=False)
+    heatmap_data["age_bucket"] = heatmap_data["charge_cycles"] // 300
+    return frames, parts_chart, heatmap_data
+
+
+def bench_session_memory(battery_rows, parts_skus, sessions):
+    datasets = {
+        "batteries": generate_battery_table(battery_rows),
+        "parts": build_parts_inventory(expand_parts_catalog(SEED_PARTS, parts_skus), BENCH_TARIFF_RATES),
+    }
+    pickled = {name: pickle.dumps(df) for name, df in datasets.items()}
+    base_mb = sum(df.memory_usage(deep=True).sum() for df in datasets.values()) / 1e6
+
+    rows = []
+    for label, shared, source in [("st.cache_data copies", False, pickled), ("shared + copy-on-write", True, datasets)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        held = [_session_views(source, shared) for _ in range(sessions)]
+        elapsed = time.perf_counter() - start
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append({
+            "strategy": label,
+            "sessions": sessions,
+            "dataset_MB": round(base_mb, 1),
+            "session_MB_total": round(current / 1e6, 1),
+            "MB_per_session": round(current / 1e6 / sessions, 2),
+            "rerun_ms_per_session": round(elapsed * 1000 / sessions, 2),
+        })
+        del held
+    _print_table(f"Per-session dataset memory ({battery_rows:,} batteries, {parts_skus:,} SKUs)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DTYPE POLICY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_dtype_report(battery_rows, parts_skus):
+    # generate_battery_table applies the policy itself; rebuild the wide frame as the "before"
+    batteries = generate_battery_table(battery_rows)
+    wide_batteries = batteries.astype({
+        col: (object if isinstance(dtype, pd.CategoricalDtype) else np.float64 if dtype.kind == "f" else np.int64 if dtype.kind == "i" else dtype)
+        for col, dtype in batteries.dtypes.items()
+    })
+    datasets = {
+        "batteries": wide_batteries,
+        "parts": build_parts_inventory(expand_parts_catalog(SEED_PARTS, parts_skus), BENCH_TARIFF_RATES),
+        "dealers": build_dealer_network(),
+        "install_base": build_install_base(),
+    }
+
+    rows = []
+    for name, before in datasets.items():
+        after, elapsed = _timed(compact_dtypes, before)
+        rows.append({
+            "dataset": name,
+            "rows": len(before),
+            "bytes_per_row_before": round(bytes_per_row(before), 1),
+            "bytes_per_row_after": round(bytes_per_row(after), 1),
+            "reduction": f"{1 - bytes_per_row(after) / bytes_per_row(before):.0%}",
+            "categoricals": sum(isinstance(t, pd.CategoricalDtype) for t in after.dtypes),
+            "convert_ms": round(elapsed * 1000, 1),
+        })
+    _print_table("Bytes per row before/after the dtype policy", rows)
+
+    # Region filter + status value_counts on object strings vs. category codes
+    selected = ["EMEA", "APAC"]
+    for label, frame in [("object strings", wide_batteries), ("category codes", batteries)]:
+        elapsed = min(_timed(lambda: frame[frame["region"].isin(selected)]["status"].value_counts())[1] for _ in range(5))
+        print(f"isin + value_counts on {label}: {elapsed * 1000:.1f} ms")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REGION FILTER ENGINE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+REGION_SELECTIONS = [
+    ["North America", "EMEA", "APAC", "LATAM"],
+    ["EMEA"],
+    ["EMEA", "APAC"],
+    ["North America", "LATAM", "APAC"],
+]
+
+
+def bench_region_filter(battery_rows, dealer_rows, repeats):
+    batteries = generate_battery_table(battery_rows)
+    dealers = compact_dtypes(build_dealer_network().sample(dealer_rows, replace=True, random_state=42).reset_index(drop=True))
+
+    rows = []
+    for name, df, extra in [("batteries", batteries, {"status": "Healthy"}), ("dealers", dealers, {"tier": "Gold"})]:
+        engine, build = _timed(PartitionedFrame, df, "region")
+        (column, value), = extra.items()
+        for regions in REGION_SELECTIONS:
+            scan = _best_of(repeats, lambda: df[df["region"].isin(regions)])
+            cached = _best_of(repeats, lambda: engine.select(regions))
+            scan_2 = _best_of(repeats, lambda: (lambda f: f[f[column] == value])(df[df["region"].isin(regions)]))
+            cached_2 = _best_of(repeats, lambda: engine.select(regions, **extra))
+            rows.append({
+                "dataset": f"{name} ({len(df):,})",
+                "regions": len(regions),
+                "isin_ms": round(scan * 1000, 2),
+                "engine_ms": round(cached * 1000, 3),
+                "isin+eq_ms": round(scan_2 * 1000, 2),
+                "engine+eq_ms": round(cached_2 * 1000, 3),
+                "build_ms": round(build * 1000, 1),
+            })
+    _print_table("Regions filter: isin scan vs. cached partitions (second filter: batteries status, dealers tier)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ANALYSIS PERIOD
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_time_window(dealer_rows, windows_days, repeats):
+    as_of = pd.Timestamp(datetime.now().date())
+    dealers = compact_dtypes(build_dealer_network().sample(dealer_rows, replace=True, random_state=42).reset_index(drop=True))
+    claims, build_events = _timed(dealer_claim_events, dealers, as_of)
+    log, build_index = _timed(EventLog, claims, "claim_date")
+
+    rows = []
+    for days in windows_days:
+        start = as_of - pd.Timedelta(days=days - 1)
+        scan = _best_of(repeats, lambda: claims[(claims["claim_date"] >= start) & (claims["claim_date"] < as_of + pd.Timedelta(days=1))])
+        sliced = _best_of(repeats, log.window, start, as_of)
+        kpis = _best_of(repeats, dealer_window_metrics, dealers, log, start, as_of)
+        rows.append({
+            "window_days": days,
+            "claims_in_window": len(log.window(start, as_of)),
+            "bool_scan_ms": round(scan * 1000, 2),
+            "searchsorted_ms": round(sliced * 1000, 3),
+            "dealer_kpis_ms": round(kpis * 1000, 1),
+        })
+    print(f"{len(claims):,} claims for {dealer_rows:,} dealers (generate {build_events:.2f}s, sort/index {build_index:.2f}s)")
+    _print_table("Analysis Period slicing: boolean scan vs. binary search", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LAST-TIME BUY OPTIMIZER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_ltb(scenario_counts, install_base, repeats):
+    parts = build_parts_inventory(SEED_PARTS, BENCH_TARIFF_RATES)
+    part = parts[parts["category"] == "Motor"].iloc[0]
+    costs = dict(
+        unit_cost=float(part["unit_cost"]),
+        holding_cost_annual_pct=float(part["holding_cost_annual_pct"]),
+        stockout_cost_per_unit=float(part["stockout_cost_per_unit"]),
+    )
+
+    rows = []
+    for n in scenario_counts:
+        run = lambda: optimize_last_time_buy(install_base, 1.5, 5.0, n_scenarios=n, service_level_target=0.95, **costs)
+        ltb = run()
+        rows.append({
+            "scenarios": n,
+            "optimize_ms": round(_best_of(repeats, run) * 1000, 1),
+            "order_qty": ltb["order_qty"],
+            "demand_p05": int(ltb["demand_p05"]),
+            "demand_p50": int(ltb["demand_p50"]),
+            "demand_p95": int(ltb["demand_p95"]),
+            "expected_cost_$M": round(ltb["expected_total_cost"] / 1e6, 3),
+        })
+    print(f"{part['part_number']} (${costs['unit_cost']:,.0f}), install base {install_base:,}, β=1.5, η=5y, 95% service target")
+    _print_table("Last-time buy Monte Carlo: wall time and convergence by scenario count", rows)
+
+
+def bench_ltb_batch(skus, worker_counts, scenarios):
+    legacy = [p for p in SEED_PARTS if p.get("legacy_support") or p.get("obsolescence_risk") == "CRITICAL"]
+    as_of = datetime.now().date()
+    family_fits = pd.DataFrame({
+        "family": list(BENCH_LIFECYCLE),
+        "shape": [spec["weibull_shape"] for spec in BENCH_LIFECYCLE.values()],
+        "scale_years": [spec["weibull_scale_years"] for spec in BENCH_LIFECYCLE.values()],
+    })
+    parts = sku_ltb_inputs(
+        build_parts_inventory(expand_parts_catalog(legacy, skus), BENCH_TARIFF_RATES),
+        build_install_base(), family_fits, dict.fromkeys(BENCH_LIFECYCLE, 84), as_of,
+    )
+
+    rows, baseline, reference = [], None, None
+    for workers in worker_counts:
+        ranked, elapsed = _timed(batch_last_time_buy, parts, 50_000, 1.5, 5.0, as_of, n_scenarios=scenarios, service_level_target=0.95, workers=workers)
+        plan = ranked.set_index("part_number")["order_qty"].sort_index()
+        reference = plan if reference is None else reference
+        baseline = baseline or elapsed
+        rows.append({
+            "workers": workers,
+            "wall_s": round(elapsed, 2),
+            "skus_per_s": round(len(ranked) / elapsed, 1),
+            "speedup": round(baseline / elapsed, 2),
+            "same_plan": plan.equals(reference),
+        })
+    print(f"{skus:,} flagged SKUs × {scenarios:,} scenarios, {os.cpu_count()} cores available")
+    _print_table("Batch last-time buy: wall time vs. process-pool workers", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WEIBULL FITTING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BENCH_LIFECYCLE = {
+    "motors": {"weibull_shape": 2.1, "weibull_scale_years": 6.5},
+    "batteries": {"weibull_shape": 1.8, "weibull_scale_years": 5.0},
+    "tcu_display": {"weibull_shape": 1.2, "weibull_scale_years": 8.0},
+    "chargers": {"weibull_shape": 1.5, "weibull_scale_years": 7.0},
+}
+
+
+def bench_weibull_fit(family_counts):
+    install_base = build_install_base()
+    as_of = datetime.now().date()
+
+    rows = []
+    for families in family_counts:
+        lifecycle = {f"{name}-{k}": spec for k in range(families // len(BENCH_LIFECYCLE) + 1) for name, spec in BENCH_LIFECYCLE.items()}
+        lifecycle = dict(list(lifecycle.items())[:families])
+        history = compact_dtypes(build_field_history(install_base, lifecycle, as_of))
+        by = ["family", "model_year"]
+        fits, batched = _timed(fit_weibull, history, by)
+        _, looped = _timed(lambda: [fit_weibull(group, by) for _, group in history.groupby(by, observed=True)])
+        rows.append({
+            "families": families,
+            "groups": len(fits),
+            "records": len(history),
+            "batched_ms": round(batched * 1000, 1),
+            "per_group_loop_ms": round(looped * 1000, 1),
+            "median_ci_width_beta": round(float((fits["shape_hi"] - fits["shape_lo"]).median()), 3),
+        })
+    print(f"{int(install_base['active_units'].sum()):,} units per family across {install_base['model_year'].nunique()} model years")
+    _print_table("Censored Weibull MLE: one batched Newton solve vs. one fit per group", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FLEET LIABILITY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _looped_quarterly_failures(install_base, reliability, quarters, obligation_years):
+    """Reference: one pass per family, cohort and quarter."""
+    totals = np.zeros(len(quarters) - 1)
+    for _, fit in reliability.iterrows():
+        for _, cohort in install_base.iterrows():
+            in_service = pd.Timestamp(year=int(cohort["model_year"]), month=7, day=1)
+            for q in range(len(quarters) - 1):
+                a0, a1 = [min(max((quarters[q + k] - in_service).days / 365.25, 0), obligation_years) for k in (0, 1)]
+                totals[q] += cohort["active_units"] * ((a1 / fit["scale_years"]) ** fit["shape"] - (a0 / fit["scale_years"]) ** fit["shape"])
+    return totals
+
+
+def bench_fleet_liability(model_counts, obligation_years):
+    reliability = pd.DataFrame({
+        "family": list(BENCH_LIFECYCLE),
+        "shape": [spec["weibull_shape"] for spec in BENCH_LIFECYCLE.values()],
+        "scale_years": [spec["weibull_scale_years"] for spec in BENCH_LIFECYCLE.values()],
+    })
+    unit_costs = np.full(len(reliability), 500.0)
+    base = build_install_base()
+
+    rows = []
+    for models in model_counts:
+        install_base = pd.concat([base.assign(model=base["model"] + f" #{k}") for k in range(models // 6)], ignore_index=True)
+        install_base = install_base.sort_values("model_year", kind="stable", ignore_index=True)
+        fleet, matrix = _timed(FleetLiability, install_base, reliability, unit_costs, obligation_years)
+        bounds = fleet.quarters.append(pd.DatetimeIndex([fleet.quarters[-1] + pd.offsets.QuarterBegin()]))
+        looped_totals, looped = _timed(_looped_quarterly_failures, install_base, reliability, bounds, obligation_years)
+        rows.append({
+            "cohorts": len(install_base),
+            "quarters": len(fleet.quarters),
+            "matrix_ms": round(matrix * 1000, 2),
+            "loop_ms": round(looped * 1000, 1),
+            "speedup": round(looped / matrix),
+            "max_abs_diff": float(np.abs(fleet.quarterly()["expected_failures"].to_numpy() - looped_totals).max()),
+        })
+    _print_table(f"Fleet liability ({obligation_years}-year window): cohort × quarter matrix vs. nested loops", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SENSITIVITY SURFACES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_sensitivity(slider_moves):
+    rng = np.random.default_rng(42)
+    shapes = rng.uniform(SHAPE_GRID[0], SHAPE_GRID[-1], slider_moves)
+    scales = rng.uniform(SCALE_GRID[0], SCALE_GRID[-1], slider_moves)
+    services = rng.integers(85, 100, slider_moves)
+    surface = SensitivitySurface(7.0, 500.0)
+
+    def per_move():
+        for b, e, s in zip(shapes, scales, services):
+            surface.failure_curve(b, e)
+            surface.capital_lockup(b, e, s)
+
+    def heatmap_loop():
+        return [[surface.capital_lockup(b, e, 95) for e in SCALE_GRID] for b in SHAPE_GRID]
+
+    rows = [{
+        "slider_moves": slider_moves,
+        "closed_form_us_per_move": round(_best_of(3, per_move) / slider_moves * 1e6, 1),
+        "heatmap_cells": SHAPE_GRID.size * SCALE_GRID.size,
+        "heatmap_broadcast_us": round(_best_of(3, surface.grid, "capital", 95) * 1e6, 1),
+        "heatmap_per_cell_us": round(_best_of(3, heatmap_loop) * 1e6, 1),
+        "max_abs_diff": float(np.abs(np.array(heatmap_loop()) - surface.grid("capital", 95)).max()),
+    }]
+    _print_table(f"Sensitivity: closed-form Weibull per slider move ({slider_moves:,} random moves) and β × η heatmap", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RIGHT-TO-REPAIR OBLIGATIONS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BENCH_LAWS = {
+    "california_sb244": {"name": "California SB-244", "jurisdiction": "California, USA", "effective_date": "2024-07-01",
+                         "requirements": {"products_over_100": 7, "products_50_to_100": 3}},
+    "eu_right_to_repair": {"name": "EU Right to Repair Directive", "jurisdiction": "European Union", "effective_date": "2025-06-01",
+                           "requirements": {"minimum_years": 10}},
+}
+
+
+def bench_obligations(skus, markets, repeats):
+    parts = build_parts_inventory(expand_parts_catalog(SEED_PARTS, skus), BENCH_TARIFF_RATES)
+    market_codes = (list(MARKET_JURISDICTIONS) + [f"MKT-{k:02d}" for k in range(markets)])[:markets]
+    index, build = _timed(ObligationIndex, parts, market_codes, range(2019, 2026), BENCH_LAWS)
+    flat = index.expiring("1970-01-01", "2100-01-01")
+
+    rows = []
+    for start, end in [("2027-01-01", "2027-01-31"), ("2030-01-01", "2030-12-31"), ("2026-01-01", "2035-12-31")]:
+        lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+        scan = _best_of(repeats, lambda: int(((flat["support_end"] >= lo) & (flat["support_end"] <= hi)).sum()))
+        rows.append({
+            "window": f"{start} .. {end}",
+            "expiring": index.count_expiring(start, end),
+            "bool_scan_ms": round(scan * 1000, 1),
+            "count_us": round(_best_of(repeats, index.count_expiring, start, end) * 1e6, 1),
+            "rows_ms": round(_best_of(repeats, index.expiring, start, end) * 1000, 1),
+        })
+    print(f"{len(index):,} obligations ({skus:,} SKUs × {markets} markets × 7 model years), built in {build:.2f}s")
+    _print_table("Obligations expiring in a window: boolean scan vs. end-date index", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TARIFF SCENARIOS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BENCH_TARIFF_SCENARIO = {
+    "name": "Bench base",
+    "rates": {
+        "taiwan_parts": {"base": 5.5, "section_301": 10.0, "total": 15.5},
+        "china_parts": {"base": 5.5, "section_301": 25.0, "total": 30.5},
+        "china_batteries": {"base": 3.4, "section_301": 25.0, "total": 28.4},
+        "vietnam_parts": {"base": 0.0, "section_301": 0.0, "total": 0.0},
+        "germany_motors": {"base": 0.0, "section_301": 0.0, "total": 0.0},
+        "japan_motors": {"base": 0.0, "section_301": 0.0, "total": 0.0},
+    },
+}
+
+
+def _random_tariff_scenarios(n, seed=42):
+    """n user-defined scenarios: the bench base with random Section 301 levels per tariff code."""
+    rng = np.random.default_rng(seed)
+    scenarios = {}
+    for k in range(n):
+        rates = {}
+        for code, parts in BENCH_TARIFF_SCENARIO["rates"].items():
+            s301 = float(rng.uniform(0, 60)) if parts["section_301"] else 0.0
+            rates[code] = {"base": parts["base"], "section_301": s301, "total": parts["base"] + s301}
+        scenarios[f"user_{k}"] = {"name": f"User {k}", "rates": rates}
+    return scenarios
+
+
+def _looped_scenario_duty(scenarios, parts):
+    """The pre-engine Tariff War Room loop: iterrows per scenario."""
+    costs = []
+    for scenario_key in scenarios:
+        rates = scenarios[scenario_key]["rates"]
+        total_cost = 0
+        for _, row in parts.iterrows():
+            rate = rates.get(row.get("tariff_code", "taiwan_parts"), {}).get("total", 0)
+            total_cost += row["unit_cost"] * row["monthly_demand"] * 12 * (rate / 100)
+        costs.append(total_cost)
+    return np.array(costs)
+
+
+def bench_tariff_matrix(skus, scenario_counts, loop_scenarios):
+    parts = compact_dtypes(build_parts_inventory(expand_parts_catalog(SEED_PARTS, skus), BENCH_TARIFF_RATES))
+
+    loop_set = _random_tariff_scenarios(loop_scenarios)
+    looped, loop_s = _timed(_looped_scenario_duty, loop_set, parts)
+    matrix = scenario_duty(loop_set, parts).to_numpy()
+    print(f"{skus:,} SKUs: iterrows loop {loop_s:.2f}s for {loop_scenarios} scenarios "
+          f"({loop_s / loop_scenarios * 1000:,.0f} ms/scenario), max abs diff vs. matrix ${np.abs(looped - matrix).max():.6f}")
+
+    rows = []
+    for n in scenario_counts:
+        scenarios = _random_tariff_scenarios(n)
+        duty, elapsed = _timed(scenario_duty, scenarios, parts)
+        rows.append({
+            "scenarios": n,
+            "matrix_ms": round(elapsed * 1000, 1),
+            "loop_estimate_s": round(loop_s / loop_scenarios * n, 1),
+            "speedup": round(loop_s / loop_scenarios * n / elapsed),
+            "p50_duty_$M": round(float(np.median(duty)) / 1e6, 2),
+        })
+    _print_table("Annual duty for N scenarios: rate matrix × value vector (loop extrapolated per scenario)", rows)
+
+
+def _looped_tariff_paths(scenarios, parts, weights, n_paths, months=24, stay=0.92, seed=42):
+    """Per-path, per-month, per-code loop: draw each code's next regime, then price that month's duty."""
+    rng = np.random.default_rng(seed)
+    keys = list(scenarios)
+    codes = tariff_codes(scenarios, parts)
+    monthly_value = annual_value_by_code(parts, codes) / 12
+    w = np.array([weights[k] for k in keys], dtype=np.float64)
+    annual = np.empty(n_paths)
+    for p in range(n_paths):
+        states, duty = [0] * len(codes), 0.0
+        for _ in range(months):
+            for c, (code, v) in enumerate(zip(codes, monthly_value)):
+                if rng.random() >= stay:
+                    jump = w.copy()
+                    jump[states[c]] = 0
+                    states[c] = int(rng.choice(len(keys), p=jump / jump.sum()))
+                duty += scenarios[keys[states[c]]]["rates"].get(code, {}).get("total", 0.0) / 100 * v
+        annual[p] = duty * 12 / months
+    return annual
+
+
+def bench_tariff_paths(skus, path_counts, loop_paths):
+    parts = compact_dtypes(build_parts_inventory(expand_parts_catalog(SEED_PARTS, skus), BENCH_TARIFF_RATES))
+    scenarios = {"base": BENCH_TARIFF_SCENARIO, **_random_tariff_scenarios(3)}
+    weights = {k: w for k, w in zip(scenarios, [0.4, 0.25, 0.2, 0.15])}
+
+    looped, loop_s = _timed(_looped_tariff_paths, scenarios, parts, weights, loop_paths)
+    print(f"{skus:,} SKUs: per-path loop {loop_s:.2f}s for {loop_paths:,} paths ({loop_s / loop_paths * 1e6:,.0f} µs/path)")
+
+    rows = []
+    cache = {}
+    for n in path_counts:
+        result, elapsed = _timed(simulate_tariff_paths, scenarios, parts, weights, None, 24, n)
+        key = scenario_hash(scenarios, weights=weights, n_paths=n)
+        cache[key] = result
+        hit = _best_of(5, lambda: cache[scenario_hash(scenarios, weights=weights, n_paths=n)])
+        total = result["annual_by_origin"].loc["All origins"]
+        rows.append({
+            "paths": n,
+            "vectorized_ms": round(elapsed * 1000, 1),
+            "loop_estimate_s": round(loop_s / loop_paths * n, 1),
+            "cache_hit_ms": round(hit * 1000, 3),
+            "p50_$M": round(total["p50"] / 1e6, 3),
+            "p90_$M": round(total["p90"] / 1e6, 3),
+            "var95_$M": round(total["var95"] / 1e6, 3),
+        })
+    print(f"loop P50 ${np.median(looped) / 1e6:.3f}M over {loop_paths:,} paths (different draws, same model)")
+    _print_table("24-month regime-switching duty paths: vectorized vs. per-path loop, and scenario-hash cache hit", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SOURCING OPTIMIZER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Same shape as SUPPLY_CHAIN_NETWORK supplier groups in app.py
+BENCH_SUPPLIERS = {
+    "Motor": {
+        "mahle": {"name": "MAHLE", "catalog_supplier": "MAHLE", "origin": "Germany", "tariff_code": "germany_motors", "share_pct": 65, "unit_cost_range": (850, 1100), "lead_time_days": 60},
+        "shimano": {"name": "Shimano", "catalog_supplier": "Shimano", "origin": "Japan", "tariff_code": "japan_motors", "share_pct": 25, "unit_cost_range": (700, 950), "lead_time_days": 75},
+        "bosch": {"name": "Bosch", "catalog_supplier": "Bosch", "origin": "Germany", "tariff_code": "germany_motors", "share_pct": 7, "unit_cost_range": (900, 1200), "lead_time_days": 55},
+        "bafang": {"name": "Bafang", "catalog_supplier": "Bafang", "origin": "China", "tariff_code": "china_parts", "share_pct": 3, "unit_cost_range": (280, 450), "lead_time_days": 45},
+        "brose": {"name": "Brose", "catalog_supplier": "Brose (LEGACY)", "origin": "Germany", "tariff_code": "germany_motors", "share_pct": 0, "unit_cost_range": (950, 1450), "lead_time_days": 120},
+    },
+    "Battery": {
+        "samsung_sdi": {"name": "Samsung SDI", "catalog_supplier": "Samsung SDI", "origin": "South Korea", "tariff_code": "taiwan_parts", "share_pct": 60, "unit_cost_range": (540, 1000), "lead_time_days": 50},
+        "lg_energy": {"name": "LG Energy", "catalog_supplier": "LG Energy", "origin": "South Korea", "tariff_code": "taiwan_parts", "share_pct": 25, "unit_cost_range": (560, 1020), "lead_time_days": 55},
+        "catl": {"name": "CATL", "catalog_supplier": "CATL", "origin": "China", "tariff_code": "china_batteries", "share_pct": 15, "unit_cost_range": (450, 850), "lead_time_days": 50},
+    },
+}
+
+
+def bench_sourcing(sizes, capacity_headroom):
+    sources = pd.concat([supplier_sources(suppliers, category) for category, suppliers in BENCH_SUPPLIERS.items()], ignore_index=True)
+    rows = []
+    for n in sizes:
+        parts = compact_dtypes(build_parts_inventory(expand_parts_catalog(SEED_PARTS, n), BENCH_TARIFF_RATES))
+        plan, elapsed = _timed(optimize_sourcing, parts, sources, BENCH_TARIFF_RATES, capacity_headroom)
+        moved = plan["assignments"]["supplier"] != plan["assignments"]["current_supplier"]
+        rows.append({
+            "skus": n,
+            "optimized_skus": plan["assignments"]["part_number"].nunique(),
+            "solve_s": round(elapsed, 2),
+            "moved_skus": plan["assignments"].loc[moved, "part_number"].nunique(),
+            "split_skus": plan["split_skus"],
+            "baseline_$M": round(plan["baseline_cost"] / 1e6, 1),
+            "optimized_$M": round(plan["optimized_cost"] / 1e6, 1),
+        })
+    _print_table(f"Sourcing assignment LP (HiGHS), motors + batteries, capacity headroom {capacity_headroom:.0%}", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HTS SCHEDULE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _bench_tariff_history():
+    """Three dated regimes over the bench tariff codes: base, a 301 hike, a partial rollback."""
+    regimes = {}
+    for key, start, bump in [("base", "2024-01-01", 0.0), ("hike", "2024-09-27", 15.0), ("rollback", "2025-05-14", 5.0)]:
+        rates = {code: {"base": r["base"], "section_301": r["section_301"] + bump * (r["section_301"] > 0)}
+                 for code, r in BENCH_TARIFF_SCENARIO["rates"].items()}
+        regimes[key] = {"effective_date": start, "rates": rates}
+    return regimes
+
+
+def _looped_duty_lookup(table, ledger):
+    """Per-row lookup: filter the schedule for the row's line and the interval containing its ship date."""
+    duty = np.empty(len(ledger))
+    for i, row in enumerate(ledger.itertuples()):
+        hit = table[(table["hts_code"] == row.hts_code) & (table["origin"] == row.origin)
+                    & (table["start"] <= row.ship_date) & (table["end"] > row.ship_date)]
+        rate = hit["total"].iloc[0] if len(hit) else np.nan
+        duty[i] = row.unit_cost * row.units * rate / 100
+    return duty
+
+
+def bench_hts_asof(skus, months, loop_rows):
+    parts = compact_dtypes(build_parts_inventory(expand_parts_catalog(SEED_PARTS, skus), BENCH_TARIFF_RATES))
+    history = _bench_tariff_history()
+    schedule = TariffSchedule(build_hts_schedule(history, list(history), schedule_lines(parts)))
+    start = pd.Timestamp("2024-01-01")
+    ledger = build_shipment_ledger(parts, start, start + pd.DateOffset(months=months) - pd.Timedelta(days=1))
+
+    resolved, asof_s = _timed(schedule.resolve, ledger)
+    sample = ledger.sample(loop_rows, random_state=42)
+    looped, loop_s = _timed(_looped_duty_lookup, schedule.table, sample)
+    agree = np.allclose(looped, resolved["duty"].to_numpy()[sample.index.to_numpy()], equal_nan=True)
+
+    rows = [{
+        "ledger_rows": len(ledger),
+        "schedule_rows": len(schedule.table),
+        "merge_asof_s": round(asof_s, 2),
+        "per_row_us": round(loop_s / loop_rows * 1e6),
+        "per_row_estimate_s": round(loop_s / loop_rows * len(ledger)),
+        "speedup": round(loop_s / loop_rows * len(ledger) / asof_s),
+        "sample_agrees": agree,
+    }]
+    replay = _best_of(5, schedule.rates_on, "2025-01-01")
+    _print_table(f"Shipment ledger duty: one merge_asof vs. per-row schedule lookup ({loop_rows:,}-row sample)", rows)
+    print(f"rates_on(date) replay via IntervalIndex: {replay * 1000:.2f} ms")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LANDED COST GRID
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BENCH_FREIGHT_RATES = {
+    "ocean_feu": {"kaohsiung_la": {"current": 2650}, "kaohsiung_oakland": {"current": 2500}, "shanghai_la": {"current": 2850}, "rotterdam_la": {"current": 2100}},
+    "air_per_kg": {"kaohsiung_la": {"current": 3.80, "express": 7.80}, "shanghai_la": {"current": 4.20, "express": 8.50},
+                   "frankfurt_la": {"current": 2.90, "express": 5.50}, "tokyo_la": {"current": 3.50, "express": 7.00}},
+    "rail_china_eu": {"xian_rotterdam": {"current": 5200}},
+}
+BENCH_GATEWAYS = {
+    "origins": {
+        "taiwan": {"ocean_feu": ["kaohsiung"], "air_per_kg": ["kaohsiung"]},
+        "germany": {"ocean_feu": ["rotterdam"], "air_per_kg": ["frankfurt"]},
+        "japan": {"air_per_kg": ["tokyo"]},
+        "china": {"ocean_feu": ["shanghai"], "air_per_kg": ["shanghai"], "rail_china_eu": ["xian"]},
+        "korea": {},
+    },
+    "hubs": {"us_west": {"ocean_feu": ["la"], "air_per_kg": ["la"]}, "eu": {"rail_china_eu": ["rotterdam"]}},
+}
+BENCH_ORIGINS = pd.DataFrame({
+    "node": ["taiwan", "germany", "japan", "china", "korea"], "name": ["Taiwan", "Germany", "Japan", "China", "Korea"],
+    "origin": ["Taiwan", "Germany", "Japan", "China", "South Korea"],
+    "tariff_code": ["taiwan_parts", "germany_motors", "japan_motors", "china_parts", "taiwan_parts"],
+    "supplier": [None] * 5,  # country-level sites: every SKU ships from its country's node
+})
+BENCH_HUBS = pd.DataFrame({"hub": ["us_west", "eu"], "name": ["US West", "EU"], "customs_territory": ["US", "EU"]})
+
+
+def _looped_cheapest(grid, parts):
+    """Per SKU, per hub: walk every origin and mode, price the cell, keep the cheapest."""
+    best = np.full((len(parts), len(grid.hubs)), np.nan)
+    for i, row in enumerate(parts.itertuples()):
+        duty_pct = BENCH_TARIFF_RATES.get(row.tariff_code, 0.0)
+        for h, territory in enumerate(grid.hubs["customs_territory"]):
+            for o in range(len(grid.origins)):
+                if not grid.eligible[i, o]:
+                    continue
+                for m in range(len(grid.modes)):
+                    rate = grid.rate_per_kg[o, h, m]
+                    if np.isnan(rate):
+                        continue
+                    cost = cost_breakdown(row.unit_cost, row.weight_kg, duty_pct if territory == "US" else 0.0, rate)["landed_cost"]
+                    if not cost >= best[i, h]:
+                        best[i, h] = cost
+    return best
+
+
+def bench_landed_grid(sizes, loop_skus):
+    rows = []
+    for n in sizes:
+        parts = compact_dtypes(build_parts_inventory(expand_parts_catalog(SEED_PARTS, n), BENCH_TARIFF_RATES))
+        grid, build_s = _timed(LandedCostGrid, parts, BENCH_ORIGINS, BENCH_HUBS, BENCH_FREIGHT_RATES, BENCH_GATEWAYS, BENCH_TARIFF_RATES)
+        cheapest, cheapest_s = _timed(grid.cheapest)
+        full_s = _best_of(3, grid.landed)
+
+        sample = parts.iloc[:loop_skus]
+        looped, loop_s = _timed(_looped_cheapest, grid, sample)
+        agree = np.allclose(looped.ravel(), cheapest["landed_cost"].to_numpy()[:loop_skus * len(grid.hubs)], equal_nan=True)
+        rows.append({
+            "skus": n,
+            "grid_cells": n * grid.rate_per_kg.size,
+            "build_ms": round(build_s * 1000, 1),
+            "full_grid_ms": round(full_s * 1000, 1),
+            "cheapest_ms": round(cheapest_s * 1000, 1),
+            "loop_estimate_s": round(loop_s / loop_skus * n, 1),
+            "sample_agrees": agree,
+            "no_lane_pct": round(100 * (cheapest["status"] != "ok").mean(), 1),
+        })
+    _print_table(f"Landed cost, SKU × origin × hub × mode: broadcast grid vs. per-cell loop ({loop_skus:,}-SKU sample)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# NETWORK FLOW
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BENCH_NETWORK = {
+    "manufacturing_sites": {
+        "merida": {"name": "Merida", "origin": "Taiwan", "tariff_code": "taiwan_parts", "capacity_annual": 0},  # sized per run
+    },
+    "motor_suppliers": BENCH_SUPPLIERS["Motor"],
+    "battery_suppliers": BENCH_SUPPLIERS["Battery"],
+    "distribution_hubs": {
+        "slc": {"name": "SLC", "customs_territory": "US", "volume_share_pct": 60},
+        "reno": {"name": "Reno", "customs_territory": "US", "volume_share_pct": 40},
+        "eu": {"name": "EU", "customs_territory": "EU", "volume_share_pct": 100},
+        "apac": {"name": "APAC", "customs_territory": "SG", "volume_share_pct": 100},
+    },
+}
+BENCH_FLOW_GATEWAYS = {
+    "origins": {
+        "merida": {"ocean_feu": ["kaohsiung"], "air_per_kg": ["kaohsiung"]},
+        **{key: {"ocean_feu": ["rotterdam"], "air_per_kg": ["frankfurt"]} for key in ("mahle", "bosch", "brose")},
+        "shimano": {"air_per_kg": ["tokyo"]},
+        "bafang": {"ocean_feu": ["shanghai"], "air_per_kg": ["shanghai"], "rail_china_eu": ["xian"]},
+        "catl": {"ocean_feu": ["shanghai"], "air_per_kg": ["shanghai"]},
+    },
+    "hubs": {
+        "slc": {"ocean_feu": ["la", "oakland"], "air_per_kg": ["la"]},
+        "reno": {"ocean_feu": ["oakland"], "air_per_kg": ["la"]},
+        "eu": {"rail_china_eu": ["rotterdam"]},
+    },
+}
+
+
+def bench_network_flow(sizes, merida_capacity_share):
+    """Full solve vs. one-lane what-ifs: a priced-out lane (no re-solve) and a carried lane (one origin block)."""
+    rows = []
+    for n in sizes:
+        parts = compact_dtypes(build_parts_inventory(expand_parts_catalog(SEED_PARTS, n), BENCH_TARIFF_RATES))
+        network = copy.deepcopy(BENCH_NETWORK)
+        taiwan_volume = parts.loc[parts["origin"].eq("Taiwan"), "monthly_demand"].sum() * 12
+        network["manufacturing_sites"]["merida"]["capacity_annual"] = merida_capacity_share * taiwan_volume
+
+        flow, solve_s = _timed(NetworkFlow, parts, network, BENCH_FREIGHT_RATES, BENCH_FLOW_GATEWAYS, BENCH_TARIFF_RATES)
+        priced_out, priced_out_s = _timed(flow.with_lane_rate, "ocean_feu", "kaohsiung_la", "current", 5000)
+        carried, carried_s = _timed(flow.with_lane_rate, "ocean_feu", "kaohsiung_oakland", "current", 1500)
+
+        edited = copy.deepcopy(BENCH_FREIGHT_RATES)
+        edited["ocean_feu"]["kaohsiung_oakland"]["current"] = 1500
+        full, full_s = _timed(NetworkFlow, parts, network, edited, BENCH_FLOW_GATEWAYS, BENCH_TARIFF_RATES)
+        rows.append({
+            "skus": n,
+            "flow_vars": sum(len(skus) * len(arcs) for skus, arcs in flow._blocks),
+            "solve_s": round(solve_s, 2),
+            "priced_out_ms": round(priced_out_s * 1000, 1),
+            "priced_out_resolved": len(priced_out.resolved),
+            "carried_lane_s": round(carried_s, 2),
+            "carried_resolved": ",".join(carried.resolved),
+            "full_resolve_s": round(full_s, 2),
+            "same_cost": np.isclose(carried.landed_cost, full.landed_cost, rtol=1e-9),
+        })
+    _print_table(f"Min-cost multi-commodity flow (HiGHS), Taiwan site at {merida_capacity_share:.0%} of Taiwan volume", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MULTIMODAL ROUTING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _bench_route_inputs(n_origins, n_ports, n_hubs, seed=42):
+    """Synthetic network, FREIGHT_RATES-shaped lanes between ports and INLAND_LEGS-shaped first/last miles."""
+    rng = np.random.default_rng(seed)
+    ports = [f"port{i}" for i in range(n_ports)]
+    freight = {"ocean_feu": {}, "air_per_kg": {}, "rail_china_eu": {}}
+    for _ in range(4 * n_ports):
+        src, dst = rng.choice(ports, 2, replace=False)
+        table = rng.choice(list(freight), p=[0.6, 0.3, 0.1])
+        if table == "air_per_kg":
+            rate = round(rng.uniform(2, 5), 2)
+            quote = {"current": rate, "express": rate * 2, "transit_days": int(rng.integers(3, 6)), "express_transit_days": int(rng.integers(1, 3))}
+        else:
+            quote = {"current": int(rng.integers(1500, 6000)), "transit_days": int(rng.integers(10, 31))}
+        freight[table][f"{src}_{dst}"] = quote
+
+    def leg(mode):
+        return {mode: {"days": int(rng.integers(1, 4)), "per_kg": round(rng.uniform(0.02, 0.12), 3)}}
+
+    inland = {f"origin{i}": {port: leg("Truck") for port in rng.choice(ports, 2, replace=False)} for i in range(n_origins)}
+    for j in range(n_hubs):
+        for port in rng.choice(ports, 3, replace=False):
+            inland.setdefault(port, {})[f"hub{j}"] = {**leg("Truck"), **leg("Rail")}
+    network = {
+        "manufacturing_sites": {f"origin{i}": {"name": f"Origin {i}", "origin": "Taiwan", "tariff_code": "taiwan_parts",
+                                               "lead_time_days": int(rng.integers(14, 90))} for i in range(n_origins)},
+        "motor_suppliers": {},
+        "battery_suppliers": {},
+        "distribution_hubs": {f"hub{j}": {"name": f"Hub {j}", "customs_territory": "US"} for j in range(n_hubs)},
+    }
+    return network, freight, inland
+
+
+def bench_routing(origin_counts, n_ports, n_hubs, queries):
+    rows = []
+    for n_origins in origin_counts:
+        network, freight, inland = _bench_route_inputs(n_origins, n_ports, n_hubs)
+        table, build_s = _timed(RouteTable, network, freight, inland)
+
+        rng = np.random.default_rng(0)
+        pairs = list(zip(rng.choice(table.origins["node"], queries), rng.choice(table.hubs["hub"], queries)))
+        start = time.perf_counter()
+        for origin, hub in pairs:
+            table.pareto(origin, hub)
+        lookup_s = (time.perf_counter() - start) / queries
+        search_s = _best_of(3, pareto_routes, table.legs, pairs[0][0])
+        rows.append({
+            "origins": n_origins,
+            "legs": len(table.legs),
+            "pareto_routes": len(table.table),
+            "all_pairs_s": round(build_s, 2),
+            "cached_query_us": round(lookup_s * 1e6, 1),
+            "search_per_query_ms": round(search_s * 1000, 2),
+            "speedup": round(search_s / lookup_s),
+        })
+    _print_table(f"Multimodal Pareto routing: {n_ports} ports, {n_hubs} hubs, cached all-pairs vs. search per query", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONTAINER LOAD PLANNING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_load_plan(sizes, months, feu_rate):
+    """One replenishment cycle per origin-country lane, packed vs. the flat 800-units-per-FEU figure."""
+    rows = []
+    for n in sizes:
+        parts = build_parts_inventory(expand_parts_catalog(SEED_PARTS, n), BENCH_TARIFF_RATES)
+        order = parts[["part_number", "category", "weight_kg", "hazmat"]].assign(
+            lane=parts["origin"].astype(str), units=parts["monthly_demand"] * months)
+        order["volume_m3"] = unit_volume_m3(order)
+        plan, plan_s = _timed(plan_loads, order, dict.fromkeys(order["lane"].unique(), feu_rate))
+        boxes = plan["containers"]
+        rows.append({
+            "skus": n,
+            "units": int(order["units"].sum()),
+            "plan_s": round(plan_s, 2),
+            "containers": len(boxes),
+            "hazmat_boxes": int(boxes["hazmat"].sum()),
+            "binding_util": round(float(np.maximum(boxes["weight_util"], boxes["volume_util"]).mean()), 3),
+            "freight_$K": round(boxes["cost"].sum() / 1e3, 1),
+            "flat_800_$K": round(order["units"].sum() * feu_rate / 800 / 1e3, 1),
+        })
+    _print_table(f"Container load plan, {months}-month replenishment, ${feu_rate:,.0f}/FEU", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# OCEAN VS. AIR BREAKEVEN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BENCH_MODAL_RATES = copy.deepcopy(BENCH_FREIGHT_RATES)
+for _lane, _days in {"kaohsiung_la": 18, "kaohsiung_oakland": 17, "shanghai_la": 20, "rotterdam_la": 28}.items():
+    BENCH_MODAL_RATES["ocean_feu"][_lane]["transit_days"] = _days
+for _lane in BENCH_MODAL_RATES["air_per_kg"].values():
+    _lane.update(transit_days=3, express_transit_days=1)
+
+
+def _scanned_breakeven(rows, max_units):
+    """Per row: price ocean and air at 1..max_units and take the first quantity where ocean is cheaper."""
+    found = []
+    for _, row in rows.iterrows():
+        units = list(range(1, max_units + 1))
+        ocean, air = modal_costs(row, units)
+        found.append(next((u for u, o, a in zip(units, ocean, air) if o < a), np.inf))
+    return np.array(found, dtype=np.float64)
+
+
+def bench_modal_breakeven(sizes, scan_rows, max_units):
+    lanes = modal_lanes(BENCH_ORIGINS, BENCH_HUBS, BENCH_MODAL_RATES, BENCH_GATEWAYS)
+    rows = []
+    for n in sizes:
+        parts = compact_dtypes(build_parts_inventory(expand_parts_catalog(SEED_PARTS, n), BENCH_TARIFF_RATES))
+        breakeven, closed_s = _timed(modal_breakeven, parts, lanes)
+
+        sample = breakeven.iloc[:scan_rows]
+        scanned, scan_s = _timed(_scanned_breakeven, sample, max_units)
+        q = sample["breakeven_units"].to_numpy()
+        in_range = q < np.minimum(sample["units_per_box"].to_numpy(), max_units)  # the scan can only see crossings inside one box
+        rows.append({
+            "skus": n,
+            "sku_lanes": len(breakeven),
+            "closed_form_ms": round(closed_s * 1000, 1),
+            "scan_estimate_s": round(scan_s / len(sample) * len(breakeven), 1),
+            "sample_agrees": bool(np.array_equal(scanned[in_range], np.floor(q[in_range]) + 1)),
+            "air_any_qty_pct": round(100 * np.isinf(breakeven["breakeven_units"]).mean(), 1),
+            "median_q*": round(float(np.median(q[np.isfinite(q)])) if np.isfinite(q).any() else np.nan, 0),
+        })
+    _print_table(f"Ocean vs. air breakeven per SKU × lane: closed form vs. 1..{max_units:,}-unit scan ({scan_rows:,}-row sample)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# APP RERUN LATENCY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _module_rerun_seconds(module, eager, repeats):
+    """Median wall time of a full script rerun with `module` selected."""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["SERVICE_COMMAND_EAGER_DATA"] = "1" if eager else "0"
+    os.environ["SERVICE_COMMAND_PROFILE"] = "1"  # app records dataset_load_ms only when profiling
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), default_timeout=300)
+    at.run()
+    at.radio[0].set_value(module).run()  # warm the caches for this module
+
+    samples, load_ms = [], []
+    for _ in range(repeats):
+        samples.append(_timed(at.run)[1])
+        load_ms.append(sum(at.session_state["dataset_load_ms"].values()))
+    loaded = sorted(at.session_state["dataset_load_ms"])
+    return float(np.median(samples)), float(np.median(load_ms)), loaded, at.radio[0].options
+
+
+def bench_rerun_latency(repeats):
+    modules = _module_rerun_seconds("🏠 Executive Dashboard", False, 1)[-1]
+    rows = []
+    for module in modules:
+        eager, eager_load, _, _ = _module_rerun_seconds(module, True, repeats)
+        lazy, lazy_load, loaded, _ = _module_rerun_seconds(module, False, repeats)
+        rows.append({
+            "module": module,
+            "eager_rerun_ms": round(eager * 1000, 1),
+            "lazy_rerun_ms": round(lazy * 1000, 1),
+            "eager_load_ms": round(eager_load, 2),
+            "lazy_load_ms": round(lazy_load, 2),
+            "datasets_loaded": ", ".join(loaded) or "-",
+        })
+    os.environ.pop("SERVICE_COMMAND_EAGER_DATA", None)
+    os.environ.pop("SERVICE_COMMAND_PROFILE", None)
+    _print_table("App rerun latency per module (median, warm caches; *_load_ms is time spent fetching datasets)", rows)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(description="Service Command performance benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p = sub.add_parser("battery-gen", help="Vectorized battery passport generation throughput")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    p.add_argument("--legacy-rows", type=int, default=20_000, help="Rows for the per-row loop baseline (0 to skip)")
+    p.set_defaults(run=lambda a: bench_battery_generation(a.sizes, a.legacy_rows))
+
+    p = sub.add_parser("passport-store", help="Columnar passport store build and projected read latency")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 1_000_000])
+    p.set_defaults(run=lambda a: bench_passport_store(a.sizes))
+
+    p = sub.add_parser("serial-lookup", help="Serial index vs. str.contains scan for Battery Trace")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--repeats", type=int, default=5)
+    p.set_defaults(run=lambda a: bench_serial_lookup(a.rows, a.repeats))
+
+    p = sub.add_parser("bulk-trace", help="Uploaded serial list join throughput")
+    p.add_argument("--registry-rows", type=int, default=1_000_000)
+    p.add_argument("--batches", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    p.add_argument("--miss-rate", type=float, default=0.05)
+    p.set_defaults(run=lambda a: bench_bulk_trace(a.registry_rows, a.batches, a.miss_rate))
+
+    p = sub.add_parser("parts-inventory", help="Vectorized parts inventory builder vs. per-row apply")
+    p.add_argument("--sizes", type=int, nargs="+", default=[30, 10_000, 80_000, 1_000_000])
+    p.add_argument("--legacy-max", type=int, default=80_000, help="Largest catalog to run the apply baseline on")
+    p.set_defaults(run=lambda a: bench_parts_inventory(a.sizes, a.legacy_max))
+
+    p = sub.add_parser("session-memory", help="Memory held by N sessions: cache_data copies vs. shared frames")
+    p.add_argument("--battery-rows", type=int, default=200_000)
+    p.add_argument("--parts-skus", type=int, default=80_000)
+    p.add_argument("--sessions", type=int, default=40)
+    p.set_defaults(run=lambda a: bench_session_memory(a.battery_rows, a.parts_skus, a.sessions))
+
+    p = sub.add_parser("dtype-report", help="Bytes per row before/after the compact dtype policy")
+    p.add_argument("--battery-rows", type=int, default=1_000_000)
+    p.add_argument("--parts-skus", type=int, default=80_000)
+    p.set_defaults(run=lambda a: bench_dtype_report(a.battery_rows, a.parts_skus))
+
+    p = sub.add_parser("region-filter", help="Regions filter: isin scan vs. cached partitions and masks")
+    p.add_argument("--battery-rows", type=int, default=1_000_000)
+    p.add_argument("--dealer-rows", type=int, default=50_000)
+    p.add_argument("--repeats", type=int, default=5)
+    p.set_defaults(run=lambda a: bench_region_filter(a.battery_rows, a.dealer_rows, a.repeats))
+
+    p = sub.add_parser("time-window", help="Analysis Period: boolean scan vs. searchsorted slicing of claim events")
+    p.add_argument("--dealer-rows", type=int, default=5_000)
+    p.add_argument("--windows", type=int, nargs="+", default=[7, 90, 365])
+    p.add_argument("--repeats", type=int, default=5)
+    p.set_defaults(run=lambda a: bench_time_window(a.dealer_rows, a.windows, a.repeats))
+
+    p = sub.add_parser("ltb", help="Last-time buy Monte Carlo optimizer wall time by scenario count")
+    p.add_argument("--scenarios", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--install-base", type=int, default=50_000)
+    p.add_argument("--repeats", type=int, default=3)
+    p.set_defaults(run=lambda a: bench_ltb(a.scenarios, a.install_base, a.repeats))
+
+    p = sub.add_parser("ltb-batch", help="Batch last-time buy wall time vs. process-pool worker count")
+    p.add_argument("--skus", type=int, default=64)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--scenarios", type=int, default=100_000)
+    p.set_defaults(run=lambda a: bench_ltb_batch(a.skus, a.workers, a.scenarios))
+
+    p = sub.add_parser("weibull-fit", help="Censored Weibull MLE: batched vs. per-group fitting")
+    p.add_argument("--families", type=int, nargs="+", default=[4, 16, 64])
+    p.set_defaults(run=lambda a: bench_weibull_fit(a.families))
+
+    p = sub.add_parser("fleet-liability", help="Cohort × quarter liability matrix vs. nested per-model loops")
+    p.add_argument("--models", type=int, nargs="+", default=[6, 24, 96])
+    p.add_argument("--obligation-years", type=int, default=7)
+    p.set_defaults(run=lambda a: bench_fleet_liability(a.models, a.obligation_years))
+
+    p = sub.add_parser("sensitivity", help="Closed-form Weibull sensitivity per slider move and β × η heatmap broadcast")
+    p.add_argument("--moves", type=int, default=10_000)
+    p.set_defaults(run=lambda a: bench_sensitivity(a.moves))
+
+    p = sub.add_parser("obligations", help="Right-to-repair obligation index: window queries vs. boolean scan")
+    p.add_argument("--skus", type=int, default=80_000)
+    p.add_argument("--markets", type=int, default=30)
+    p.add_argument("--repeats", type=int, default=5)
+    p.set_defaults(run=lambda a: bench_obligations(a.skus, a.markets, a.repeats))
+
+    p = sub.add_parser("tariff-matrix", help="Tariff scenario duty: rate matrix vs. per-row iterrows loop")
+    p.add_argument("--skus", type=int, default=80_000)
+    p.add_argument("--scenarios", type=int, nargs="+", default=[4, 1_000, 5_000])
+    p.add_argument("--loop-scenarios", type=int, default=2)
+    p.set_defaults(run=lambda a: bench_tariff_matrix(a.skus, a.scenarios, a.loop_scenarios))
+
+    p = sub.add_parser("tariff-paths", help="Stochastic tariff-path duty: vectorized regime paths vs. per-path loop")
+    p.add_argument("--skus", type=int, default=80_000)
+    p.add_argument("--paths", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--loop-paths", type=int, default=500)
+    p.set_defaults(run=lambda a: bench_tariff_paths(a.skus, a.paths, a.loop_paths))
+
+    p = sub.add_parser("sourcing", help="Sourcing-shift assignment LP over an expanded parts catalog")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 80_000])
+    p.add_argument("--capacity-headroom", type=float, default=0.0)
+    p.set_defaults(run=lambda a: bench_sourcing(a.sizes, a.capacity_headroom))
+
+    p = sub.add_parser("hts-asof", help="Effective-dated HTS duty: merge_asof over a shipment ledger vs. per-row lookups")
+    p.add_argument("--skus", type=int, default=80_000)
+    p.add_argument("--months", type=int, default=24)
+    p.add_argument("--loop-rows", type=int, default=2_000)
+    p.set_defaults(run=lambda a: bench_hts_asof(a.skus, a.months, a.loop_rows))
+
+    p = sub.add_parser("landed-grid", help="Landed cost over SKU × origin × hub × mode: broadcast vs. per-cell loop")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 80_000])
+    p.add_argument("--loop-skus", type=int, default=2_000)
+    p.set_defaults(run=lambda a: bench_landed_grid(a.sizes, a.loop_skus))
+
+    p = sub.add_parser("network-flow", help="Min-cost multi-commodity flow: full solve vs. incremental lane what-ifs")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 40_000])
+    p.add_argument("--merida-capacity-share", type=float, default=0.9)
+    p.set_defaults(run=lambda a: bench_network_flow(a.sizes, a.merida_capacity_share))
+
+    p = sub.add_parser("routing", help="Multimodal Pareto routing: cached all-pairs table vs. search per query")
+    p.add_argument("--origins", type=int, nargs="+", default=[12, 100, 400])
+    p.add_argument("--ports", type=int, default=40)
+    p.add_argument("--hubs", type=int, default=4)
+    p.add_argument("--queries", type=int, default=2_000)
+    p.set_defaults(run=lambda a: bench_routing(a.origins, a.ports, a.hubs, a.queries))
+
+    p = sub.add_parser("load-plan", help="Container load planning: weight × volume packing with hazmat segregation")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 80_000])
+    p.add_argument("--months", type=int, default=1)
+    p.add_argument("--feu-rate", type=float, default=2650.0)
+    p.set_defaults(run=lambda a: bench_load_plan(a.sizes, a.months, a.feu_rate))
+
+    p = sub.add_parser("modal-breakeven", help="Ocean vs. air breakeven for every SKU × lane: closed form vs. quantity scan")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 80_000])
+    p.add_argument("--scan-rows", type=int, default=500)
+    p.add_argument("--max-units", type=int, default=2_000)
+    p.set_defaults(run=lambda a: bench_modal_breakeven(a.sizes, a.scan_rows, a.max_units))
+
+    p = sub.add_parser("rerun-latency", help="Per-module rerun latency, eager vs. lazy dataset loading")
+    p.add_argument("--repeats", type=int, default=5)
+    p.set_defaults(run=lambda a: bench_rerun_latency(a.repeats))
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
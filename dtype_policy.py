@@ -0,0 +1,50 @@
+"""
+Dtype policy for generated Service Command datasets.
+
+Low-cardinality label columns become categoricals and calendar / code
+integers are downcast, so groupby / isin / value_counts run on integer
+category codes and every frame carries fewer bytes per row. Money and
+quantity columns keep int64 / float64: elementwise arithmetic such as
+unit_cost * monthly_demand * 12 runs at full width and cannot wrap.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Label columns stored as pandas categoricals wherever they appear
+CATEGORY_COLUMNS = [
+    "region", "sub_region", "location", "status", "chemistry", "tier",
+    "category", "origin", "tariff_code", "supplier", "obsolescence_risk", "risk_level",
+]
+
+# Calendar years, year counts and pack sizes: labels in numeric form, never multiplied by money or quantities
+CODE_COLUMNS = [
+    "model_year", "launch_year", "warranty_end_year", "legal_support_end_year",
+    "warranty_years", "right_to_repair_years", "capacity_wh", "battery_wh",
+]
+
+
+def _downcast_int(series):
+    lo, hi = series.min(), series.max()
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return series.astype(dtype)
+    return series
+
+
+def compact_dtypes(df, categories=CATEGORY_COLUMNS, codes=CODE_COLUMNS):
+    """Return a copy of `df` with categorical labels and int16/int32 code columns; other numerics keep their width."""
+    out = df.copy(deep=False)
+    for col in out.columns:
+        series = out[col]
+        if col in categories and not isinstance(series.dtype, pd.CategoricalDtype):
+            out[col] = series.astype("category")
+        elif col in codes and len(series) and pd.api.types.is_integer_dtype(series.dtype) and isinstance(series.dtype, np.dtype):
+            out[col] = _downcast_int(series)
+    return out
+
+
+def bytes_per_row(df):
+    """Deep memory footprint of `df` divided by its row count."""
+    return df.memory_usage(deep=True, index=False).sum() / max(len(df), 1)
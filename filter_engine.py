@@ -0,0 +1,93 @@
+"""
+Global Regions filter engine.
+
+Each dataset is laid out once, grouped by region, so every region is a
+contiguous row range. Any region selection is then a set of cached ranges:
+a single run comes back as a zero-copy slice, several runs as one `take` over
+concatenated cached index arrays. Equality masks for secondary filters
+(status, location, tier ...) are cached per value on the same layout.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class PartitionedFrame:
+    """A frame grouped by one partition column with cached row ranges and masks.
+
+    Build once per dataset version and treat as read-only. Partitions keep the
+    order in which their values first appear, and rows keep their relative
+    order within a partition.
+    """
+
+    def __init__(self, df, column="region"):
+        codes, uniques = pd.factorize(df[column], sort=False)
+        order = np.argsort(codes, kind="stable")
+        self.column = column
+        self.frame = df.take(order).reset_index(drop=True)
+
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))])
+        self._ranges = {value: (int(bounds[i]), int(bounds[i + 1])) for i, value in enumerate(uniques)}
+        self._rows = {}
+        self._masks = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def partitions(self):
+        return list(self._ranges)
+
+    def _runs(self, values):
+        """Merged (start, stop) row ranges covering the selected partitions."""
+        spans = sorted(self._ranges[v] for v in set(values) if v in self._ranges)
+        runs = []
+        for start, stop in spans:
+            if runs and runs[-1][1] == start:
+                runs[-1] = (runs[-1][0], stop)
+            else:
+                runs.append((start, stop))
+        return runs
+
+    def rows(self, values):
+        """Row positions of the selected partitions (cached per selection)."""
+        key = frozenset(values)
+        if key not in self._rows:
+            runs = self._runs(key)
+            self._rows[key] = np.concatenate([np.arange(a, b) for a, b in runs]) if runs else np.array([], dtype=np.intp)
+        return self._rows[key]
+
+    def mask(self, column, value):
+        """Cached boolean mask over the partitioned frame for `column == value`."""
+        key = (column, value)
+        if key not in self._masks:
+            mask = (self.frame[column] == value).to_numpy()
+            mask.flags.writeable = False
+            self._masks[key] = mask
+        return self._masks[key]
+
+    def select(self, values, **equals):
+        """Rows in the selected partitions, optionally narrowed by column == value filters.
+
+        With no extra filters a contiguous selection is returned as a slice of
+        the shared frame rather than a copy.
+        """
+        runs = self._runs(values)
+        if not equals and len(runs) == 1:
+            start, stop = runs[0]
+            return self.frame.iloc[start:stop]
+
+        rows = self.rows(values)
+        for column, value in equals.items():
+            rows = rows[self.mask(column, value)[rows]]
+        return self.frame.take(rows)
+
+    def count(self, values, **equals):
+        """Row count of `select(values, **equals)` without building the frame."""
+        if not equals:
+            return sum(stop - start for start, stop in self._runs(values))
+        rows = self.rows(values)
+        keep = np.ones(len(rows), dtype=bool)
+        for column, value in equals.items():
+            keep &= self.mask(column, value)[rows]
+        return int(keep.sum())
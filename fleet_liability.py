@@ -0,0 +1,79 @@
+"""
+Fleet liability engine - cohort × quarter failure forecast.
+
+Every install-base cohort (model year × model) accrues failures at its
+age-dependent Weibull hazard for as long as it is inside the right-to-repair
+obligation window. Expected failures for all component families, cohorts
+and calendar quarters come out of one broadcast array operation, so the
+Executive Dashboard reserve and the quarterly demand curve are just sums
+over that matrix.
+"""
+
+import numpy as np
+import pandas as pd
+
+OBLIGATION_WINDOWS_YEARS = {"US (CA SB-244)": 7, "EU (proposed)": 10}
+IN_SERVICE_MONTH = 7  # a model year's units enter service, on average, mid-year
+
+# Component family (COMPONENT_LIFECYCLE) -> parts catalog category priced per failure
+FAMILY_PART_CATEGORY = {
+    "motors": "Motor",
+    "batteries": "Battery",
+    "tcu_display": "Electronics",
+    "chargers": "Charger",
+}
+
+
+def cost_per_failure(parts, families):
+    """Mean unit cost of the parts catalog category behind each component family."""
+    category_cost = parts.groupby("category", observed=True)["unit_cost"].mean()
+    return np.array([float(category_cost.get(FAMILY_PART_CATEGORY.get(f), 0.0)) for f in families])
+
+
+class FleetLiability:
+    """Expected failures per family × cohort × calendar quarter over one obligation window.
+
+    Units are repaired and stay in service, so each quarter contributes the
+    increase in Weibull cumulative hazard, (a1/η)^β - (a0/η)^β, per active unit.
+    Ages are capped at the obligation window, after which a cohort accrues
+    nothing.
+    """
+
+    def __init__(self, install_base, reliability, unit_costs, obligation_years=7):
+        self.install_base = install_base
+        self.families = list(reliability["family"].astype(str))
+        self.obligation_years = obligation_years
+
+        first, last = int(install_base["model_year"].min()), int(install_base["model_year"].max())
+        bounds = pd.date_range(f"{first}-01-01", f"{last + obligation_years + 1}-01-01", freq="QS")
+        self.quarters = bounds[:-1]
+
+        in_service = pd.to_datetime(install_base["model_year"].astype(int).astype(str) + f"-{IN_SERVICE_MONTH:02d}-01")
+        age = (bounds.to_numpy()[None, :] - in_service.to_numpy()[:, None]) / np.timedelta64(1, "D") / 365.25
+        age = np.clip(age, 0, obligation_years)  # [cohort, boundary]
+
+        shape = reliability["shape"].to_numpy(dtype=np.float64)[:, None, None]
+        scale = reliability["scale_years"].to_numpy(dtype=np.float64)[:, None, None]
+        cumulative_hazard = (age[None, :, :] / scale) ** shape  # [family, cohort, boundary]
+        units = install_base["active_units"].to_numpy(dtype=np.float64)[None, :, None]
+        self.failures = np.diff(cumulative_hazard, axis=2) * units  # [family, cohort, quarter]
+        self.cost = np.tensordot(np.asarray(unit_costs, dtype=np.float64), self.failures, axes=1)  # [cohort, quarter]
+
+    def _from(self, as_of):
+        return 0 if as_of is None else int(self.quarters.searchsorted(pd.Timestamp(as_of), side="right")) - 1
+
+    def quarterly(self, cohorts=slice(None)):
+        """Expected failures per family plus total failures and cost per calendar quarter."""
+        frame = pd.DataFrame(self.failures[:, cohorts, :].sum(axis=1).T, index=self.quarters, columns=self.families)
+        frame["expected_failures"] = frame[self.families].sum(axis=1)
+        frame["expected_cost"] = self.cost[cohorts, :].sum(axis=0)
+        frame.index.name = "quarter"
+        return frame
+
+    def reserve(self, as_of=None, cohorts=slice(None)):
+        """Expected cost still to come from the quarter containing `as_of` to the end of every window."""
+        return float(self.cost[cohorts, max(self._from(as_of), 0):].sum())
+
+    def cohort_cost(self):
+        """Expected cost over each cohort's full obligation window, aligned with install_base rows."""
+        return pd.Series(self.cost.sum(axis=1), index=self.install_base.index, name="obligation_cost")
@@ -0,0 +1,137 @@
+"""
+Effective-dated HTS tariff schedule - as-of duty resolution.
+
+Duty is set per HTS code × country of origin and changes on effective
+dates. The schedule holds one row per line and [start, end) interval, with
+an IntervalIndex over the intervals, so a whole shipment ledger is priced
+by one merge_asof on ship date instead of a rate lookup per row, and any
+historical date can be replayed.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Parts catalog category -> HTS subheading the service parts enter under
+HTS_BY_CATEGORY = {
+    "Motor": "8501.32.20",  # DC motors, 750 W - 14.9 kW
+    "Battery": "8507.60.00",  # Lithium-ion accumulators
+    "Electronics": "8537.10.91",  # Control units / displays, ≤ 1000 V
+    "Charger": "8504.40.95",  # Static converters
+}
+OPEN_END = pd.Timestamp("2099-12-31")
+
+
+def hts_codes(categories):
+    """HTS subheading for each parts catalog category (NaN when unmapped)."""
+    return pd.Series(categories, dtype="string").map(HTS_BY_CATEGORY)
+
+
+def schedule_lines(parts):
+    """Distinct HTS × origin lines in the catalog with the tariff bucket that prices them."""
+    lines = pd.DataFrame({
+        "hts_code": hts_codes(parts["category"].astype(str)).to_numpy(),
+        "origin": parts["origin"].astype(str).to_numpy(),
+        "tariff_code": parts["tariff_code"].astype(str).to_numpy(),
+    })
+    return lines.dropna().drop_duplicates(["hts_code", "origin"]).reset_index(drop=True)
+
+
+def build_hts_schedule(scenarios, timeline, lines):
+    """One row per HTS × origin line per regime in `timeline`.
+
+    `timeline` lists scenario keys in force one after another, each from
+    its scenario's effective_date until the next one starts (the last stays
+    open). Rates come from the scenario's entry for the line's tariff bucket.
+    """
+    starts = pd.to_datetime([scenarios[key]["effective_date"] for key in timeline])
+    ends = list(starts[1:]) + [OPEN_END]
+    frames = []
+    for key, start, end in zip(timeline, starts, ends):
+        rates = scenarios[key]["rates"]
+        frames.append(lines.assign(
+            start=start,
+            end=end,
+            base=[rates.get(code, {}).get("base", 0.0) for code in lines["tariff_code"]],
+            section_301=[rates.get(code, {}).get("section_301", 0.0) for code in lines["tariff_code"]],
+            scenario=key,
+        ))
+    table = pd.concat(frames, ignore_index=True)
+    table["total"] = table["base"] + table["section_301"]
+    return table
+
+
+class TariffSchedule:
+    """Effective-dated duty rates per HTS × origin with as-of resolution."""
+
+    def __init__(self, table):
+        self.table = table.sort_values("start", kind="stable").reset_index(drop=True)
+        self.intervals = pd.IntervalIndex.from_arrays(self.table["start"], self.table["end"], closed="left")
+
+    @property
+    def first_date(self):
+        return self.table["start"].min()
+
+    def rates_on(self, date):
+        """Schedule rows in force on `date`."""
+        return self.table[self.intervals.contains(pd.Timestamp(date))].reset_index(drop=True)
+
+    def resolve(self, ledger, date_col="ship_date"):
+        """Duty rate, duty $ and landed cost for every ledger row, in ledger order.
+
+        `ledger` needs hts_code, origin, unit_cost, units and `date_col`.
+        Rows shipped before a line's first interval, or on an unknown line,
+        get NaN rates.
+        """
+        # Join only (row, line id, date); the ledger's own columns never get sorted
+        lines = pd.MultiIndex.from_frame(self.table[["hts_code", "origin"]].astype(str)).unique()
+        line = lines.get_indexer(pd.MultiIndex.from_arrays([ledger["hts_code"].astype(str), ledger["origin"].astype(str)]))
+        keyed = pd.DataFrame({
+            "_row": np.arange(len(ledger)),
+            "_line": line,
+            "_date": pd.to_datetime(ledger[date_col]).to_numpy().astype("datetime64[ns]"),
+        }).sort_values("_date", kind="stable")
+        table = pd.DataFrame({
+            "_line": lines.get_indexer(pd.MultiIndex.from_frame(self.table[["hts_code", "origin"]].astype(str))),
+            "_date": self.table["start"].to_numpy().astype("datetime64[ns]"),
+            "end": self.table["end"].to_numpy().astype("datetime64[ns]"),
+        }).join(self.table[["base", "section_301", "total"]])
+        joined = pd.merge_asof(keyed, table, on="_date", by="_line", direction="backward")
+        joined.loc[joined["_date"] >= joined["end"], ["base", "section_301", "total"]] = np.nan
+
+        rates = np.full((len(ledger), 3), np.nan)
+        rates[joined["_row"].to_numpy()] = joined[["base", "section_301", "total"]].to_numpy(dtype=np.float64)
+        out = ledger.reset_index(drop=True).assign(
+            base_rate_pct=rates[:, 0],
+            section_301_pct=rates[:, 1],
+            duty_rate_pct=rates[:, 2],
+        )
+        value = out["unit_cost"].to_numpy(dtype=np.float64) * out["units"].to_numpy(dtype=np.float64)
+        out["duty"] = value * out["duty_rate_pct"].to_numpy() / 100
+        out["landed_cost"] = value + out["duty"]
+        return out
+
+
+def build_shipment_ledger(parts, start, end, seed=42):
+    """One inbound shipment per SKU per month between start and end.
+
+    Ship day is uniform within the month; units are the SKU's monthly
+    demand with ±25% noise.
+    """
+    rng = np.random.default_rng(seed)
+    months = pd.date_range(pd.Timestamp(start).to_period("M").to_timestamp(), end, freq="MS")
+    n_parts, n_months = len(parts), len(months)
+
+    month = np.tile(months.to_numpy(), n_parts)
+    days = np.tile(months.days_in_month.to_numpy(), n_parts)
+    ship_date = month + (rng.random(n_parts * n_months) * days).astype(np.int64).astype("timedelta64[D]")
+    sku = np.repeat(np.arange(n_parts), n_months)
+    demand = parts["monthly_demand"].to_numpy(dtype=np.float64)[sku]
+    ledger = pd.DataFrame({
+        "ship_date": ship_date,
+        "part_number": parts["part_number"].to_numpy()[sku],
+        "hts_code": hts_codes(parts["category"].astype(str)).to_numpy()[sku],
+        "origin": parts["origin"].to_numpy()[sku],
+        "unit_cost": parts["unit_cost"].to_numpy(dtype=np.float64)[sku],
+        "units": np.maximum(np.rint(demand * rng.uniform(0.75, 1.25, len(sku))), 1).astype(np.int32),
+    })
+    return ledger[ledger["ship_date"] <= pd.Timestamp(end)].reset_index(drop=True)
@@ -0,0 +1,195 @@
+"""
+Landed cost engine - dense origin × hub × mode rate arrays.
+
+FREIGHT_RATES lanes are laid out once as a per-kg rate array over every
+network origin, distribution hub and transport mode (NaN where no lane
+exists). Landed cost for every SKU × origin × hub × mode is then freight +
+duty + insurance + handling in one broadcast; the cheapest path per SKU and
+hub reduces to an argmin over the rate array per set of eligible origins
+(eligible_origins: the SKU's own supplier's nodes, else the manufacturing
+sites in its country). Missing lanes stay NaN and are reported, never
+replaced by a flat default rate.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Mode label -> (FREIGHT_RATES table, rate column)
+FREIGHT_MODES = {
+    "Ocean (FCL)": ("ocean_feu", "current"),
+    "Air Freight": ("air_per_kg", "current"),
+    "Air Express": ("air_per_kg", "express"),
+    "Rail (China-EU)": ("rail_china_eu", "current"),
+}
+PER_KG_TABLES = {"air_per_kg"}  # other tables quote $ per 40ft container
+CONTAINER_PAYLOAD_KG = 8_000  # boxed service parts cube out well before a FEU's weight limit
+INSURANCE_PCT = 0.005  # cargo insurance, share of FOB value
+HANDLING_PER_UNIT = 15.0
+CHEAPEST_STATUS = ["ok", "no lane", "no eligible origin"]
+DUTY_TERRITORY = "US"  # TARIFF_SCENARIOS are US rates; other customs territories carry no modeled duty
+
+
+def network_origins(network, groups=("manufacturing_sites", "motor_suppliers", "battery_suppliers")):
+    """One row per SUPPLY_CHAIN_NETWORK origin node: key, name, country, tariff bucket and catalog supplier (None for sites)."""
+    return pd.DataFrame([
+        {"node": key, "group": group, "name": spec["name"], "origin": spec["origin"], "tariff_code": spec["tariff_code"],
+         "supplier": spec.get("catalog_supplier")}
+        for group in groups for key, spec in network[group].items()
+    ])
+
+
+def eligible_origins(parts, origins):
+    """[sku, origin] True where the origin node can ship the SKU.
+
+    A SKU whose catalog supplier has network nodes ships only from that
+    supplier's nodes in its country of origin; any other SKU ships from the
+    manufacturing sites (nodes without a catalog_supplier) in its country.
+    These sets never overlap, so no SKU draws on another supplier's capacity.
+    """
+    node_supplier = origins["supplier"].to_numpy(dtype=object)
+    supplier = parts["supplier"].astype(str).to_numpy()
+    in_country = parts["origin"].astype(str).to_numpy()[:, None] == origins["origin"].to_numpy()[None, :]
+    own = supplier[:, None] == node_supplier[None, :]
+    has_node = np.isin(supplier, node_supplier[pd.notna(node_supplier)].astype(str))
+    site = pd.isna(node_supplier)
+    return in_country & np.where(has_node[:, None], own, site[None, :])
+
+
+def origin_sets(parts, eligible):
+    """Distinct rows of `eligible` ([set, origin]) and each SKU's set.
+
+    Eligibility depends only on a SKU's country and supplier, so SKUs are
+    grouped on those two columns rather than by comparing whole rows.
+    """
+    group = parts.groupby([parts["origin"].astype(str), parts["supplier"].astype(str)], sort=False).ngroup().to_numpy()
+    _, first = np.unique(group, return_index=True)
+    sets, row = np.unique(eligible[first], axis=0, return_inverse=True)
+    return sets, row.ravel()[group]
+
+
+def network_hubs(network):
+    """One row per distribution hub: key, name and customs territory."""
+    return pd.DataFrame([
+        {"hub": key, "name": spec["name"], "customs_territory": spec["customs_territory"]}
+        for key, spec in network["distribution_hubs"].items()
+    ])
+
+
+def lane_rates(origins, hubs, freight_rates, gateways, modes=FREIGHT_MODES):
+    """[origin, hub, mode] freight $/kg (NaN = no lane) and the lane key each rate came from.
+
+    Where a node or hub has several gateways for a table, the cheapest
+    existing lane wins.
+    """
+    rates = np.full((len(origins), len(hubs), len(modes)), np.nan)
+    lanes = np.full(rates.shape, "", dtype=object)
+    for k, (table, column) in enumerate(modes.values()):
+        per_kg = 1.0 if table in PER_KG_TABLES else 1 / CONTAINER_PAYLOAD_KG
+        for i, node in enumerate(origins["node"]):
+            for j, hub in enumerate(hubs["hub"]):
+                for src in gateways["origins"].get(node, {}).get(table, []):
+                    for dst in gateways["hubs"].get(hub, {}).get(table, []):
+                        quote = freight_rates.get(table, {}).get(f"{src}_{dst}", {}).get(column)
+                        if quote is not None and not quote * per_kg >= rates[i, j, k]:
+                            rates[i, j, k] = quote * per_kg
+                            lanes[i, j, k] = f"{src}_{dst}"
+    return rates, lanes
+
+
+def cost_breakdown(fob, weight_kg, duty_pct, rate_per_kg, insurance_pct=INSURANCE_PCT, handling_per_unit=HANDLING_PER_UNIT):
+    """Freight, duty, insurance, handling and total landed cost for one unit on one lane."""
+    parts = {
+        "freight": weight_kg * rate_per_kg,
+        "duty": fob * duty_pct / 100,
+        "insurance": fob * insurance_pct,
+        "handling": handling_per_unit,
+    }
+    parts["landed_cost"] = fob + sum(parts.values())
+    return parts
+
+
+class LandedCostGrid:
+    """Landed cost per unit for every SKU × origin × hub × mode.
+
+    A SKU ships only from its eligible_origins (its supplier's own nodes, or
+    the manufacturing sites in its country); duty is its tariff bucket's rate
+    for hubs in DUTY_TERRITORY and zero elsewhere. Cells without a lane or an
+    eligible origin are NaN.
+    """
+
+    def __init__(self, parts, origins, hubs, freight_rates, gateways, tariff_rates, modes=FREIGHT_MODES,
+                 insurance_pct=INSURANCE_PCT, handling_per_unit=HANDLING_PER_UNIT):
+        self.parts = parts
+        self.origins = origins
+        self.hubs = hubs
+        self.modes = pd.Index(list(modes))
+        self.rate_per_kg, self.lanes = lane_rates(origins, hubs, freight_rates, gateways, modes)
+
+        self.unit_cost = parts["unit_cost"].to_numpy(dtype=np.float64)
+        self.weight_kg = parts["weight_kg"].to_numpy(dtype=np.float64)
+        self.eligible = eligible_origins(parts, origins)  # [sku, origin]
+        duty_pct = parts["tariff_code"].astype(str).map(tariff_rates).fillna(0.0).to_numpy(dtype=np.float64)
+        dutiable = hubs["customs_territory"].eq(DUTY_TERRITORY).to_numpy()
+        self.duty = self.unit_cost[:, None] * duty_pct[:, None] / 100 * dutiable[None, :]  # [sku, hub]
+        self.fixed = self.unit_cost * (1 + insurance_pct) + handling_per_unit  # [sku]
+
+    def landed(self):
+        """[sku, origin, hub, mode] landed cost per unit; NaN where there is no lane or eligible origin."""
+        grid = (self.fixed[:, None, None, None] + self.duty[:, None, :, None]
+                + self.weight_kg[:, None, None, None] * self.rate_per_kg[None, :, :, :])
+        grid[~self.eligible] = np.nan
+        return grid
+
+    def missing_lanes(self):
+        """Origin × hub × mode combinations with no FREIGHT_RATES lane."""
+        o, h, m = np.nonzero(np.isnan(self.rate_per_kg))
+        return pd.DataFrame({
+            "origin": self.origins["node"].to_numpy()[o],
+            "hub": self.hubs["hub"].to_numpy()[h],
+            "mode": self.modes[m],
+        })
+
+    def cheapest(self):
+        """Cheapest origin and mode per SKU × hub with its cost breakdown.
+
+        Only freight varies across origins and modes, and it is weight ×
+        $/kg, so the cheapest lane per set of eligible origins and hub is the
+        cheapest for every SKU sharing that set: one argmin over the rate
+        array, then a gather per SKU. status is "ok", "no eligible origin"
+        (no network node may ship the SKU) or "no lane" (eligible origins
+        exist but none reaches the hub).
+        """
+        sets, group = origin_sets(self.parts, self.eligible)  # [set, origin], [sku]
+        n_hub, n_mode = len(self.hubs), len(self.modes)
+        rates = np.where(sets[:, :, None, None], np.nan_to_num(self.rate_per_kg, nan=np.inf)[None], np.inf)  # [set, origin, hub, mode]
+        rates = rates.transpose(0, 2, 1, 3).reshape(len(sets), n_hub, -1)
+        best = np.argmin(rates, axis=2)  # [set, hub]
+        best_rate = np.take_along_axis(rates, best[:, :, None], axis=2)[:, :, 0]
+        best_origin, best_mode = np.divmod(best, n_mode)
+
+        hub = np.arange(n_hub)[None, :]
+        origin, mode, rate = best_origin[group], best_mode[group], best_rate[group]  # [sku, hub]
+        found = np.isfinite(rate)
+        freight = np.where(found, self.weight_kg[:, None] * rate, np.nan)
+        extras = self.fixed - self.unit_cost
+        status = np.where(found, 0, np.where(sets.any(axis=1)[group][:, None], 1, 2))
+        lane_codes, lane_names = pd.factorize(self.lanes.ravel())
+        lane = lane_codes.reshape(self.lanes.shape)[origin, hub, mode]
+
+        # Categoricals from codes (-1 where no path) keep the 4-rows-per-SKU frame cheap to build
+        def categorical(codes, categories):
+            return pd.Categorical.from_codes(np.where(found, codes, -1).ravel(), categories)
+
+        return pd.DataFrame({
+            "part_number": np.repeat(self.parts["part_number"].to_numpy(), n_hub),
+            "hub": pd.Categorical.from_codes(np.tile(np.arange(n_hub), len(self.parts)), self.hubs["hub"]),
+            "status": pd.Categorical.from_codes(status.ravel(), CHEAPEST_STATUS),
+            "origin": categorical(origin, self.origins["node"]),
+            "mode": categorical(mode, self.modes),
+            "lane": categorical(lane, lane_names),
+            "fob": np.repeat(self.unit_cost, n_hub),
+            "freight": freight.ravel(),
+            "duty": np.where(found, self.duty, np.nan).ravel(),
+            "insurance_handling": np.where(found, extras[:, None], np.nan).ravel(),
+            "landed_cost": (self.fixed[:, None] + self.duty + freight).ravel(),
+        })
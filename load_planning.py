@@ -0,0 +1,176 @@
+"""
+Container load planner - weight × volume packing of replenishment orders.
+
+A replenishment order (units per SKU per containerized lane) is packed
+into 40ft boxes by payload and stowable volume, one lane at a time, with
+hazmat SKUs segregated into their own boxes under a dangerous-goods
+payload cap. The packer is a two-ended greedy: SKUs sorted by density,
+each box filled from the dense end while it is weight-light and from the
+bulky end while it is volume-light, so boxes cube and weigh out together.
+Boxes that end up fitting a 20ft spec are downsized. Each box's cost is
+shared across its lines by the box's binding dimension, giving a true
+per-SKU freight share instead of a flat units-per-container figure.
+"""
+
+import numpy as np
+import pandas as pd
+
+from landed_cost import PER_KG_TABLES
+
+CONTAINER_SPECS = {
+    "20ft": {"payload_kg": 28_000, "volume_m3": 33.2, "rate_factor": 0.6},  # rate_factor: share of the FEU quote
+    "40ft": {"payload_kg": 26_500, "volume_m3": 67.7, "rate_factor": 1.0},
+}
+STOWAGE_FACTOR = 0.85  # usable share of internal volume once cartons are palletized and braced
+PACKED_DENSITY_KG_M3 = {"Motor": 180, "Battery": 260, "Electronics": 60, "Charger": 110}  # boxed service parts
+DEFAULT_DENSITY_KG_M3 = 150
+HAZMAT_MAX_KG = 12_000  # carrier acceptance cap for lithium-ion (UN3480/3481) per box
+HAZMAT_SURCHARGE = 450.0  # dangerous-goods surcharge per box
+
+
+def unit_volume_m3(parts):
+    """Packed volume per unit: a volume_m3 column when present, else weight over category packing density."""
+    if "volume_m3" in parts:
+        return parts["volume_m3"].to_numpy(dtype=np.float64)
+    density = parts["category"].astype(str).map(PACKED_DENSITY_KG_M3).fillna(DEFAULT_DENSITY_KG_M3)
+    return parts["weight_kg"].to_numpy(dtype=np.float64) / density.to_numpy(dtype=np.float64)
+
+
+def units_per_container(weight_kg, volume_m3, hazmat, spec=CONTAINER_SPECS["40ft"]):
+    """Whole units of one SKU a container holds, by payload (hazmat-capped) and stowable volume."""
+    payload = np.where(hazmat, min(spec["payload_kg"], HAZMAT_MAX_KG), spec["payload_kg"])
+    return np.floor(np.minimum(payload / weight_kg, spec["volume_m3"] * STOWAGE_FACTOR / volume_m3))
+
+
+def containerized_order(sku_flows, parts, freight_rates, months=1, column="current"):
+    """Replenishment order for `months` of NetworkFlow.sku_flows() on container lanes, and each lane's FEU quote.
+
+    Lanes are "<FREIGHT_RATES lane> → <hub>"; units round up to whole units.
+    """
+    flows = sku_flows[~sku_flows["table"].isin(PER_KG_TABLES)]
+    feu_rates = {f"{lane} → {hub}": freight_rates[table][lane][column]
+                 for table, lane, hub in flows[["table", "lane", "hub"]].drop_duplicates().itertuples(index=False)}
+    order = flows[["part_number"]].assign(
+        lane=(flows["lane"] + " → " + flows["hub"]).to_numpy(),
+        units=np.ceil(flows["units"].to_numpy() * months / 12).astype(np.int64),
+    ).merge(parts[["part_number", "category", "weight_kg", "hazmat"]], on="part_number", how="left")
+    order["volume_m3"] = unit_volume_m3(order)
+    return order, feu_rates
+
+
+def _limits(spec, hazmat):
+    payload = min(spec["payload_kg"], HAZMAT_MAX_KG) if hazmat else spec["payload_kg"]
+    return payload, spec["volume_m3"] * STOWAGE_FACTOR
+
+
+def _pack(weight, volume, units, payload, capacity):
+    """Two-ended greedy over density-sorted SKUs; returns (box, sku, units) per line."""
+    left = units.copy()
+    box, lines = 0, []
+    box_w = box_v = 0.0
+    lo, hi = 0, len(units) - 1
+    while lo <= hi:
+        # Weight-light boxes take dense SKUs, volume-light boxes take bulky ones
+        ends = (lo, hi) if box_w / payload <= box_v / capacity else (hi, lo)
+        for k in ends:
+            fit = int(min((payload - box_w) / weight[k], (capacity - box_v) / volume[k]))
+            if fit > 0:
+                break
+        else:
+            if box_w == 0 and box_v == 0:
+                raise ValueError(f"one unit of SKU position {ends[0]} exceeds an empty container")
+            box, box_w, box_v = box + 1, 0.0, 0.0
+            continue
+        take = min(fit, left[k])
+        lines.append((box, k, take))
+        box_w += take * weight[k]
+        box_v += take * volume[k]
+        left[k] -= take
+        if left[k] == 0:
+            if k == lo:
+                lo += 1
+            else:
+                hi -= 1
+    return lines
+
+
+def plan_loads(order, feu_rates, specs=CONTAINER_SPECS):
+    """Pack a replenishment order into containers and share each box's cost across its SKUs.
+
+    `order` needs lane, part_number, units, weight_kg, volume_m3 and hazmat;
+    `feu_rates` maps lane to its 40ft quote. Returns a dict with one row per
+    container ("containers"), per container × SKU line ("lines") and per
+    lane × SKU freight share ("sku_freight").
+    """
+    order = order[order["units"] > 0].reset_index(drop=True)
+    weight = order["weight_kg"].to_numpy(dtype=np.float64)
+    volume = order["volume_m3"].to_numpy(dtype=np.float64)
+    hazmat = order["hazmat"].fillna(False).astype(bool).to_numpy()
+    units = order["units"].to_numpy(dtype=np.int64)
+    lane_code, lanes = pd.factorize(order["lane"])
+
+    # Groups are lane × hazmat class; within a group densest SKUs first
+    order_idx = np.lexsort((-(weight / volume), hazmat, lane_code))
+    group = lane_code[order_idx] * 2 + hazmat[order_idx]
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    ends = np.r_[starts[1:], len(order_idx)]
+
+    big, small = specs["40ft"], specs["20ft"]
+    box_lane, box_hazmat, line_box, line_sku, line_units = [], [], [], [], []
+    n_boxes = 0
+    for s, e in zip(starts, ends):
+        idx = order_idx[s:e]
+        haz = bool(hazmat[idx[0]])
+        lines = _pack(weight[idx], volume[idx], units[idx], *_limits(big, haz))
+        box, k, take = map(np.asarray, zip(*lines))
+        line_box.append(box + n_boxes)
+        line_sku.append(idx[k])
+        line_units.append(take)
+        count = int(box.max()) + 1
+        box_lane.append(np.full(count, lane_code[idx[0]]))
+        box_hazmat.append(np.full(count, haz))
+        n_boxes += count
+
+    line_box, line_sku, line_units = np.concatenate(line_box), np.concatenate(line_sku), np.concatenate(line_units)
+    box_lane, box_hazmat = np.concatenate(box_lane), np.concatenate(box_hazmat)
+    line_w, line_v = line_units * weight[line_sku], line_units * volume[line_sku]
+    box_w = np.bincount(line_box, weights=line_w, minlength=n_boxes)
+    box_v = np.bincount(line_box, weights=line_v, minlength=n_boxes)
+
+    # Downsize boxes whose load fits a 20ft
+    small_payload = np.where(box_hazmat, min(small["payload_kg"], HAZMAT_MAX_KG), small["payload_kg"])
+    is_small = (box_w <= small_payload) & (box_v <= small["volume_m3"] * STOWAGE_FACTOR)
+    payload = np.where(is_small, small_payload, np.where(box_hazmat, min(big["payload_kg"], HAZMAT_MAX_KG), big["payload_kg"]))
+    capacity = np.where(is_small, small["volume_m3"], big["volume_m3"]) * STOWAGE_FACTOR
+    feu = pd.Series(lanes).map(feu_rates).to_numpy(dtype=np.float64)[box_lane]
+    cost = feu * np.where(is_small, small["rate_factor"], big["rate_factor"]) + HAZMAT_SURCHARGE * box_hazmat
+
+    # Each line pays its share of the box's binding dimension
+    weight_util, volume_util = box_w / payload, box_v / capacity
+    by_weight = weight_util >= volume_util
+    share = np.where(by_weight[line_box], line_w / box_w[line_box], line_v / box_v[line_box])
+    line_freight = cost[line_box] * share
+
+    containers = pd.DataFrame({
+        "container": np.arange(n_boxes),
+        "lane": lanes.to_numpy()[box_lane],
+        "type": np.where(is_small, "20ft", "40ft"),
+        "hazmat": box_hazmat,
+        "weight_kg": box_w,
+        "volume_m3": box_v,
+        "weight_util": weight_util,
+        "volume_util": volume_util,
+        "cost": cost,
+    })
+    lines = pd.DataFrame({
+        "container": line_box,
+        "lane": lanes.to_numpy()[lane_code[line_sku]],
+        "part_number": order["part_number"].to_numpy()[line_sku],
+        "units": line_units,
+        "freight": line_freight,
+    })
+    freight = np.bincount(line_sku, weights=line_freight, minlength=len(order))
+    sku_freight = order[["lane", "part_number", "units", "weight_kg"]].assign(
+        feu_rate=order["lane"].map(feu_rates).to_numpy(dtype=np.float64), freight=freight, freight_per_unit=freight / units,
+    )
+    return {"containers": containers, "lines": lines, "sku_freight": sku_freight}
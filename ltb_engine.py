@@ -0,0 +1,300 @@
+"""
+Last-Time Buy (LTB) optimizer - vectorized Monte Carlo.
+
+Samples first-failure demand for an install base from a Weibull (β, η) over
+the right-to-repair support horizon, then picks the order quantity that
+minimizes expected stockout + scrap + holding cost across all scenarios.
+Scenarios are simulated in NumPy chunks whose per-period demand histograms
+are summed, and every integer order quantity is costed from those
+histograms, so 100k scenarios run in well under a second and memory does
+not grow with the scenario count. batch_last_time_buy fans the same optimization out over
+every flagged SKU on a process pool, each SKU with its own install base,
+fitted family Weibull and support window (sku_ltb_inputs).
+"""
+
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fleet_liability import FAMILY_PART_CATEGORY
+
+PERIODS_PER_YEAR = 4  # quarterly demand buckets for holding cost and bands
+SALVAGE_PCT = 0.3  # liquidation value of scrapped LTB stock
+PARAMETER_CV = 0.10  # scenario-to-scenario uncertainty in the fitted β and η
+BAND_QUANTILES = [0.05, 0.5, 0.95]  # P5 / P50 / P95 confidence bands
+DEFAULT_HORIZON_YEARS = 7  # right-to-repair support window when a SKU has no support_end_date
+LTB_RISK_LEVELS = ["CRITICAL"]  # obsolescence_risk values that force an LTB decision
+SCENARIO_CHUNK = 65_536  # scenarios simulated at once; bounds peak memory at ~20 MB per 40 periods
+
+
+def weibull_cdf(t, shape, scale):
+    """Fraction of units failed by time t (same units as scale)."""
+    return -np.expm1(-(np.asarray(t, dtype=np.float64) / scale) ** shape)
+
+
+def simulate_demand_histograms(install_base, shape, scale, horizon_years, n_scenarios, parameter_cv=PARAMETER_CV, seed=42,
+                               chunk=SCENARIO_CHUNK):
+    """Histogram of cumulative failures per period over all scenarios.
+
+    Returns (period_end_years [T], counts [T, install_base + 1], total_sum,
+    total_max), where counts[t, j] is the number of scenarios with j failures
+    by the end of period t and total_sum / total_max summarize the horizon
+    totals. Each scenario draws its own β and η around the inputs and a
+    binomial horizon total from the install base; the total is then phased
+    over the periods along that scenario's Weibull curve, so paths are
+    monotone integers. Scenarios are simulated `chunk` at a time and only
+    their histograms are kept, so memory does not grow with n_scenarios.
+    """
+    rng = np.random.default_rng(seed)
+    periods = int(np.ceil(horizon_years * PERIODS_PER_YEAR))
+    period_end = np.minimum(np.arange(1, periods + 1) / PERIODS_PER_YEAR, horizon_years)
+
+    shapes = shape * rng.lognormal(0.0, parameter_cv, n_scenarios)
+    scales = scale * rng.lognormal(0.0, parameter_cv, n_scenarios)
+    counts = np.zeros((periods, install_base + 1), dtype=np.int64)
+    total_sum, total_max = 0, 0
+    for lo in range(0, n_scenarios, chunk):
+        hi = min(lo + chunk, n_scenarios)
+        failed_share = weibull_cdf(period_end[None, :], shapes[lo:hi, None], scales[lo:hi, None])
+        total = rng.binomial(install_base, failed_share[:, -1])
+        # Phase the total in place: share of the horizon's failures by each period end
+        failed_share /= np.maximum(failed_share[:, -1:], 1e-12)
+        failed_share *= total[:, None]
+        # Column-major so each period is contiguous for the histogram pass
+        cumulative = np.rint(failed_share, out=failed_share).astype(np.int32, order="F")
+        del failed_share
+        for t in range(periods):
+            counts[t] += np.bincount(cumulative[:, t], minlength=install_base + 1)
+        total_sum += int(total.sum())
+        total_max = max(total_max, int(total.max()))
+    return period_end, counts, total_sum, total_max
+
+
+def _expected_leftover(cdf):
+    """E[max(Q - value, 0)] for every integer Q, as Σ_{j<Q} P(value ≤ j)."""
+    return np.concatenate([[0.0], np.cumsum(cdf)[:-1]])
+
+
+def optimize_last_time_buy(
+    install_base,
+    shape,
+    scale,
+    unit_cost,
+    holding_cost_annual_pct,
+    stockout_cost_per_unit,
+    horizon_years=7,
+    n_scenarios=100_000,
+    service_level_target=None,
+    salvage_pct=SALVAGE_PCT,
+    parameter_cv=PARAMETER_CV,
+    seed=42,
+):
+    """Choose the LTB quantity minimizing expected stockout + scrap + holding cost.
+
+    Costs per unit: stockout_cost_per_unit for demand the buy cannot cover,
+    unit_cost * (1 - salvage_pct) for stock left at the end of the horizon,
+    and unit_cost * holding_cost_annual_pct per year for stock on the shelf.
+    When service_level_target is given, only quantities covering at least that
+    share of scenarios are eligible. Returns a dict with the optimum, its cost
+    breakdown, the service level it achieves, demand confidence bands and the
+    full cost curve.
+    """
+    install_base = int(install_base)
+    period_end, counts, total_sum, total_max = simulate_demand_histograms(
+        install_base, shape, scale, horizon_years, n_scenarios, parameter_cv, seed)
+    quantities = np.arange(install_base + 1)
+
+    # One histogram per period prices every candidate Q at once
+    cdfs = np.cumsum(counts, axis=1, out=counts) / n_scenarios
+    period_years = np.diff(np.concatenate([[0.0], period_end]))
+    shelf_unit_years = sum(_expected_leftover(cdf) * years for cdf, years in zip(cdfs, period_years))
+    coverage = cdfs[-1]
+    leftover = _expected_leftover(coverage)
+    shortfall = total_sum / n_scenarios - quantities + leftover
+
+    stockout_cost = shortfall * stockout_cost_per_unit
+    scrap_cost = leftover * unit_cost * (1 - salvage_pct)
+    holding_cost = shelf_unit_years * unit_cost * holding_cost_annual_pct
+    total_cost = stockout_cost + scrap_cost + holding_cost
+
+    eligible = total_cost if service_level_target is None else np.where(coverage >= service_level_target, total_cost, np.inf)
+    order_qty = int(np.argmin(eligible))
+
+    bands = np.array([np.searchsorted(cdf, BAND_QUANTILES) for cdf in cdfs]).T
+    p05, p50, p95 = bands[:, -1]
+    curve = slice(int(np.searchsorted(coverage, 0.001)), total_max + 1)
+    return {
+        "order_qty": order_qty,
+        "investment": order_qty * unit_cost,
+        "expected_stockout_cost": float(stockout_cost[order_qty]),
+        "expected_scrap_cost": float(scrap_cost[order_qty]),
+        "expected_holding_cost": float(holding_cost[order_qty]),
+        "expected_total_cost": float(total_cost[order_qty]),
+        "expected_scrap_units": float(leftover[order_qty]),
+        "expected_shortfall_units": float(shortfall[order_qty]),
+        "service_level": float(coverage[order_qty]),
+        "demand_p05": float(p05),
+        "demand_p50": float(p50),
+        "demand_p95": float(p95),
+        "n_scenarios": n_scenarios,
+        "band_years": period_end,
+        "band_p05": bands[0],
+        "band_p50": bands[1],
+        "band_p95": bands[2],
+        "curve_qty": quantities[curve],
+        "curve_total_cost": total_cost[curve],
+        "curve_stockout_cost": stockout_cost[curve],
+        "curve_scrap_cost": scrap_cost[curve],
+        "curve_holding_cost": holding_cost[curve],
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BATCH LTB ACROSS FLAGGED SKUs
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def flag_ltb_parts(parts):
+    """Rows of the parts catalog that need a last-time buy decision."""
+    legacy = parts["legacy_support"].eq(True) if "legacy_support" in parts else False
+    critical = parts["obsolescence_risk"].isin(LTB_RISK_LEVELS) if "obsolescence_risk" in parts else False
+    return parts[legacy | critical]
+
+
+def sku_ltb_inputs(parts, install_base, family_fits, support_months, as_of):
+    """Per-SKU family, install base, fitted Weibull and support end date for the LTB optimizer.
+
+    Each SKU takes the fitted β / η (family_fits: family, shape, scale_years)
+    of the component family behind its category (FAMILY_PART_CATEGORY). Its
+    install base is the active units of cohorts sold up to its
+    discontinuation year (every cohort while it is current), split across
+    the SKUs of its category by monthly demand. support_end_date is the
+    catalog's where set, else discontinuation (or `as_of` for a current part)
+    plus the family's `support_months`.
+    """
+    as_of = pd.Timestamp(as_of)
+    category = parts["category"].astype(str)
+    family = category.map({cat: fam for fam, cat in FAMILY_PART_CATEGORY.items()})
+    fits = family_fits.set_index(family_fits["family"].astype(str))
+
+    def dates(column):
+        if column not in parts:
+            return pd.Series(pd.NaT, index=parts.index, dtype="datetime64[ns]")
+        return pd.to_datetime(parts[column], errors="coerce")
+
+    discontinued = dates("discontinuation_date")
+    cohorts = install_base.groupby("model_year", observed=True)["active_units"].sum().sort_index()
+    sold_by_year = cohorts.cumsum().to_numpy(dtype=np.float64)
+    last_year = discontinued.dt.year.fillna(cohorts.index.max()).to_numpy()
+    position = np.searchsorted(cohorts.index.to_numpy(), last_year, side="right") - 1
+    sold = np.where(position >= 0, sold_by_year[np.maximum(position, 0)], 0.0)
+    demand = parts["monthly_demand"].astype(np.float64)
+    share = (demand / demand.groupby(category).transform("sum")).fillna(0.0).to_numpy()
+
+    window = pd.to_timedelta(family.map(support_months).astype(np.float64) / 12 * 365.25, unit="D")
+    support_end = dates("support_end_date").fillna(discontinued.fillna(as_of) + window)
+    return parts.assign(
+        family=family,
+        install_base=np.rint(sold * share).astype(np.int64),
+        weibull_shape=family.map(fits["shape"]).astype(np.float64),
+        weibull_scale=family.map(fits["scale_years"]).astype(np.float64),
+        support_end_date=support_end,
+    )
+
+
+def support_horizon_years(support_end, as_of, default=DEFAULT_HORIZON_YEARS):
+    """Years from `as_of` to `support_end` (at least one quarter); `default` when undated."""
+    if pd.isna(support_end):
+        return default
+    return max((pd.Timestamp(support_end) - pd.Timestamp(as_of)).days / 365.25, 1 / PERIODS_PER_YEAR)
+
+
+def sku_seed(part_number, seed=42):
+    """Independent, reproducible RNG stream for one SKU, stable across batches and worker counts."""
+    return np.random.SeedSequence(seed, spawn_key=(zlib.crc32(str(part_number).encode()),))
+
+
+def _optimize_sku(job):
+    """Process-pool worker: one SKU in, one summary row out (no per-scenario arrays)."""
+    ltb = optimize_last_time_buy(**job["params"])
+    return {
+        "part_number": job["part_number"],
+        "install_base": job["params"]["install_base"],
+        "shape": job["params"]["shape"],
+        "scale": job["params"]["scale"],
+        "horizon_years": job["params"]["horizon_years"],
+        "order_qty": ltb["order_qty"],
+        "capital_lockup": ltb["investment"],
+        "expected_scrap_units": ltb["expected_scrap_units"],
+        "expected_scrap_cost": ltb["expected_scrap_cost"],
+        "expected_total_cost": ltb["expected_total_cost"],
+        "service_level": ltb["service_level"],
+        "demand_p05": ltb["demand_p05"],
+        "demand_p50": ltb["demand_p50"],
+        "demand_p95": ltb["demand_p95"],
+    }
+
+
+def batch_last_time_buy(
+    parts,
+    install_base,
+    shape,
+    scale,
+    as_of,
+    n_scenarios=100_000,
+    service_level_target=None,
+    workers=None,
+    executor=None,
+    seed=42,
+):
+    """Run the LTB optimization for every flagged SKU and rank by capital lock-up.
+
+    The horizon for each SKU runs from `as_of` to its support_end_date (7 years
+    when undated). Per-SKU `install_base`, `weibull_shape` and `weibull_scale`
+    columns (see sku_ltb_inputs) take precedence; install_base / shape / scale
+    fill in where a SKU has none. SKUs run on `executor` when given (a pool
+    the caller keeps alive); otherwise workers=1 runs inline and any other
+    value starts a process pool for this call (`None` = one worker per core).
+    """
+    flagged = flag_ltb_parts(parts)
+    as_of = pd.Timestamp(as_of)
+    if "support_end_date" in flagged:
+        support_end = pd.to_datetime(flagged["support_end_date"], errors="coerce")
+    else:
+        support_end = pd.Series(pd.NaT, index=flagged.index)
+
+    def value(part, column, default):
+        return default if pd.isna(part.get(column, np.nan)) else part[column]
+
+    jobs = []
+    for (_, part), end in zip(flagged.iterrows(), support_end):
+        jobs.append({
+            "part_number": part["part_number"],
+            "params": dict(
+                install_base=int(value(part, "install_base", install_base)),
+                shape=float(value(part, "weibull_shape", shape)),
+                scale=float(value(part, "weibull_scale", scale)),
+                unit_cost=float(part["unit_cost"]),
+                holding_cost_annual_pct=float(part["holding_cost_annual_pct"]),
+                stockout_cost_per_unit=float(part["stockout_cost_per_unit"]),
+                horizon_years=round(support_horizon_years(end, as_of), 2),
+                n_scenarios=n_scenarios,
+                service_level_target=service_level_target,
+                seed=sku_seed(part["part_number"], seed),
+            ),
+        })
+
+    if executor is not None and len(jobs) > 1:
+        rows = list(executor.map(_optimize_sku, jobs))
+    elif workers == 1 or len(jobs) <= 1:
+        rows = [_optimize_sku(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_optimize_sku, jobs))
+
+    columns = ["part_number", "install_base", "shape", "scale", "horizon_years", "order_qty", "capital_lockup", "expected_scrap_units",
+               "expected_scrap_cost", "expected_total_cost", "service_level", "demand_p05", "demand_p50", "demand_p95"]
+    ranked = pd.DataFrame(rows, columns=columns).sort_values("capital_lockup", ascending=False, ignore_index=True)
+    ranked.insert(0, "rank", np.arange(1, len(ranked) + 1))
+    return ranked
@@ -0,0 +1,94 @@
+"""
+Modal decision engine - closed-form ocean vs. air breakeven.
+
+Shipping q units by ocean costs one FEU plus q units' carrying cost over
+the ocean transit; by air it costs q × (weight × $/kg + carrying cost over
+the shorter air transit). Duty and insurance are the same either way and
+cancel. Air is cheaper below q* = FEU cost / (air freight premium − holding
+saved) per unit, and cheaper at any quantity when that premium is at most
+the per-unit cost of a full box. Every SKU × origin → hub lane with both
+modes gets its q* in one vectorized pass.
+"""
+
+import numpy as np
+import pandas as pd
+
+from landed_cost import CONTAINER_PAYLOAD_KG, FREIGHT_MODES, lane_rates
+from load_planning import HAZMAT_SURCHARGE, unit_volume_m3, units_per_container
+from parts_inventory import HOLDING_COST_ANNUAL_PCT
+from routing import lane_transit_days
+
+OCEAN_MODE = "Ocean (FCL)"
+AIR_MODE = "Air Freight"
+
+
+def modal_lanes(origins, hubs, freight_rates, gateways, ocean_mode=OCEAN_MODE, air_mode=AIR_MODE, modes=FREIGHT_MODES):
+    """Origin × hub pairs quoted for both modes: cheapest ocean FEU and air $/kg lane with transit days.
+
+    Origins of one country that share both lanes collapse into one row.
+    """
+    pair_modes = {mode: modes[mode] for mode in (ocean_mode, air_mode)}
+    rates, lanes = lane_rates(origins, hubs, freight_rates, gateways, pair_modes)
+    o, h = np.nonzero(~np.isnan(rates).any(axis=2))
+    (ocean_table, ocean_column), (air_table, air_column) = pair_modes.values()
+    ocean_lane, air_lane = lanes[o, h, 0], lanes[o, h, 1]
+    pairs = pd.DataFrame({
+        "origin": origins["node"].to_numpy()[o],
+        "country": origins["origin"].to_numpy()[o],
+        "hub": hubs["hub"].to_numpy()[h],
+        "ocean_lane": ocean_lane,
+        "air_lane": air_lane,
+        "feu_rate": rates[o, h, 0] * CONTAINER_PAYLOAD_KG,  # lane_rates spreads FEU quotes over the payload
+        "air_per_kg": rates[o, h, 1],
+        "ocean_days": [lane_transit_days(freight_rates[ocean_table][lane], ocean_column) for lane in ocean_lane],
+        "air_days": [lane_transit_days(freight_rates[air_table][lane], air_column) for lane in air_lane],
+    })
+    # Origins in one country sharing both gateways price identically; keep one row listing them
+    keys = [c for c in pairs.columns if c != "origin"]
+    return pairs.groupby(keys, sort=False, as_index=False).agg(origin=("origin", ", ".join))[["origin", *keys]]
+
+
+def modal_breakeven(parts, lanes):
+    """Breakeven quantity for every SKU × lane from the SKU's country of origin.
+
+    breakeven_units is q*: ship by air below it, by ocean above it; inf
+    when air wins at any quantity. Carrying cost uses the SKU's
+    holding_cost_annual_pct (HOLDING_COST_ANNUAL_PCT when absent).
+    """
+    holding = parts["holding_cost_annual_pct"] if "holding_cost_annual_pct" in parts else HOLDING_COST_ANNUAL_PCT
+    skus = pd.DataFrame({
+        "part_number": parts["part_number"].to_numpy(),
+        "country": parts["origin"].astype(str).to_numpy(),
+        "unit_cost": parts["unit_cost"].to_numpy(dtype=np.float64),
+        "weight_kg": parts["weight_kg"].to_numpy(dtype=np.float64),
+        "volume_m3": unit_volume_m3(parts),
+        "hazmat": parts["hazmat"].fillna(False).astype(bool).to_numpy() if "hazmat" in parts else False,
+        "holding_pct": np.broadcast_to(np.asarray(holding, dtype=np.float64), len(parts)),
+    })
+    out = skus.merge(lanes, on="country", how="inner")
+
+    box_units = units_per_container(out["weight_kg"].to_numpy(), out["volume_m3"].to_numpy(), out["hazmat"].to_numpy())
+    box_cost = out["feu_rate"].to_numpy() + HAZMAT_SURCHARGE * out["hazmat"].to_numpy()
+    holding_per_day = out["unit_cost"].to_numpy() * out["holding_pct"].to_numpy() / 365
+    days_saved = (out["ocean_days"] - out["air_days"]).to_numpy(dtype=np.float64)
+    premium = out["weight_kg"].to_numpy() * out["air_per_kg"].to_numpy() - holding_per_day * days_saved
+
+    always_air = premium <= box_cost / box_units
+    with np.errstate(divide="ignore"):
+        breakeven = np.where(always_air, np.inf, box_cost / premium)
+    return out.drop(columns=["country", "volume_m3", "holding_pct"]).assign(
+        units_per_box=box_units,
+        box_cost=box_cost,
+        air_premium_per_unit=premium,
+        holding_saved_per_unit=holding_per_day * days_saved,
+        breakeven_units=breakeven,
+    )
+
+
+def modal_costs(row, units):
+    """Ocean and air cost of shipping `units` of one breakeven row (for plotting)."""
+    units = np.asarray(units, dtype=np.float64)
+    holding_per_day = row["holding_saved_per_unit"] / max(row["ocean_days"] - row["air_days"], 1e-12)
+    ocean = np.ceil(units / row["units_per_box"]) * row["box_cost"] + units * holding_per_day * row["ocean_days"]
+    air = units * (row["weight_kg"] * row["air_per_kg"] + holding_per_day * row["air_days"])
+    return ocean, air
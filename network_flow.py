@@ -0,0 +1,277 @@
+"""
+Network flow optimizer - min-cost multi-commodity flow.
+
+Every SKU is a commodity shipped from its eligible network origins (its own
+supplier's nodes, else the manufacturing sites in its country; see
+landed_cost.eligible_origins) to the distribution hubs. Arcs are the quoted
+FREIGHT_RATES lanes between an origin's and a hub's gateways, one per mode,
+priced at landed cost per unit (FOB + freight + duty + insurance +
+handling). Origins carry annual capacity shared by every SKU they ship and
+hubs pull the catalog's regional demand split by volume_share_pct.
+Eligible origin sets never overlap, so capacities only couple SKUs sharing
+one set and the LP is solved per set block with HiGHS; a lane rate edit
+re-solves only the blocks that use the lane - or none, when the lane
+carries no flow and stays priced out.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+from landed_cost import (
+    CONTAINER_PAYLOAD_KG,
+    DUTY_TERRITORY,
+    FREIGHT_MODES,
+    HANDLING_PER_UNIT,
+    INSURANCE_PCT,
+    PER_KG_TABLES,
+    eligible_origins,
+    network_hubs,
+    network_origins,
+    origin_sets,
+)
+
+# Hub customs territory -> parts catalog regional demand column
+HUB_DEMAND_COLUMNS = {"US": "monthly_demand_us", "EU": "monthly_demand_eu", "SG": "monthly_demand_apac"}
+UNSERVED_COST_MULTIPLE = 10.0  # penalty per unmet unit, × unit cost: above any landed cost, so demand is met wherever a lane exists
+REDUCED_COST_TOLERANCE = 1e-7
+
+
+def lane_quote_per_kg(table, quote):
+    """FREIGHT_RATES quote as $/kg (FEU quotes spread over CONTAINER_PAYLOAD_KG)."""
+    return quote if table in PER_KG_TABLES else quote / CONTAINER_PAYLOAD_KG
+
+
+def network_arcs(origins, hubs, freight_rates, gateways, modes=FREIGHT_MODES):
+    """One row per origin × hub × mode × quoted lane; every gateway pair with a quote is its own arc."""
+    rows = []
+    for mode, (table, column) in modes.items():
+        for i, node in enumerate(origins["node"]):
+            for j, hub in enumerate(hubs["hub"]):
+                for src in gateways["origins"].get(node, {}).get(table, []):
+                    for dst in gateways["hubs"].get(hub, {}).get(table, []):
+                        quote = freight_rates.get(table, {}).get(f"{src}_{dst}", {}).get(column)
+                        if quote is not None:
+                            rows.append({"origin": i, "hub": j, "mode": mode, "table": table, "column": column,
+                                         "lane": f"{src}_{dst}", "rate_per_kg": lane_quote_per_kg(table, quote)})
+    return pd.DataFrame(rows, columns=["origin", "hub", "mode", "table", "column", "lane", "rate_per_kg"])
+
+
+def node_capacities(network, origins, parts):
+    """Annual units each origin can ship.
+
+    Sites use capacity_annual. Suppliers get their share_pct of annual
+    catalog volume in the categories their supplier group covers, and never
+    less than the volume of their own catalog SKUs.
+    """
+    annual = parts["monthly_demand"].to_numpy(dtype=np.float64) * 12
+    supplier = parts["supplier"].astype(str).to_numpy()
+    category = parts["category"].astype(str).to_numpy()
+    capacity = np.zeros(len(origins))
+    for i, (group, node) in enumerate(zip(origins["group"], origins["node"])):
+        spec = network[group][node]
+        if "capacity_annual" in spec:
+            capacity[i] = spec["capacity_annual"]
+            continue
+        own = supplier == spec.get("catalog_supplier")
+        group_suppliers = [s.get("catalog_supplier") for s in network[group].values()]
+        category_volume = annual[np.isin(category, np.unique(category[np.isin(supplier, group_suppliers)]))].sum()
+        capacity[i] = max(spec.get("share_pct", 0) / 100 * category_volume, annual[own].sum())
+    return capacity
+
+
+def hub_demand(parts, network, hubs):
+    """[sku, hub] annual units: the hub territory's regional demand × the hub's volume_share_pct."""
+    demand = np.zeros((len(parts), len(hubs)))
+    for j, (hub, territory) in enumerate(zip(hubs["hub"], hubs["customs_territory"])):
+        share = network["distribution_hubs"][hub].get("volume_share_pct", 100) / 100
+        demand[:, j] = parts[HUB_DEMAND_COLUMNS[territory]].to_numpy(dtype=np.float64) * 12 * share
+    return demand
+
+
+class NetworkFlow:
+    """Min landed-cost routing of hub demand over the supply chain network.
+
+    Variables are flow per SKU × arc plus unmet demand per SKU × hub; each
+    SKU × hub demand row is met exactly, each origin ships at most its
+    capacity. A SKU ships only from its eligible_origins, so supplier nodes
+    carry only their own catalog SKUs; duty is charged at hubs in
+    DUTY_TERRITORY.
+    """
+
+    def __init__(self, parts, network, freight_rates, gateways, tariff_rates, modes=FREIGHT_MODES,
+                 insurance_pct=INSURANCE_PCT, handling_per_unit=HANDLING_PER_UNIT):
+        self.parts = parts.reset_index(drop=True)
+        self.origins = network_origins(network)
+        self.hubs = network_hubs(network)
+        self.arcs = network_arcs(self.origins, self.hubs, freight_rates, gateways, modes)
+        self.capacity = node_capacities(network, self.origins, self.parts)
+        self.demand = hub_demand(self.parts, network, self.hubs)
+
+        self.unit_cost = self.parts["unit_cost"].to_numpy(dtype=np.float64)
+        self.weight_kg = self.parts["weight_kg"].to_numpy(dtype=np.float64)
+        duty_pct = self.parts["tariff_code"].astype(str).map(tariff_rates).fillna(0.0).to_numpy(dtype=np.float64)
+        dutiable = self.hubs["customs_territory"].eq(DUTY_TERRITORY).to_numpy()
+        self.duty = self.unit_cost[:, None] * duty_pct[:, None] / 100 * dutiable[None, :]  # [sku, hub]
+        self.fixed = self.unit_cost * (1 + insurance_pct) + handling_per_unit
+
+        # Blocks: the SKUs sharing one eligible origin set and the arcs out of those origins
+        sets, block = origin_sets(self.parts, eligible_origins(self.parts, self.origins))
+        arc_origin = self.arcs["origin"].to_numpy()
+        self._blocks = [(np.flatnonzero(block == b), np.flatnonzero(sets[b][arc_origin])) for b in range(len(sets))]
+        nodes = self.origins["node"].to_numpy()
+        self.block_names = ["+".join(nodes[origin_set]) or "no eligible origin" for origin_set in sets]
+        rates = self.arcs["rate_per_kg"].to_numpy(dtype=np.float64)
+        self._solutions = [self._solve(skus, arcs, rates) for skus, arcs in self._blocks]
+        self.resolved = list(self.block_names)
+
+    def _costs(self, skus, arcs, rates):
+        """[sku, arc] landed cost per unit and [sku, hub] unmet-demand penalty."""
+        hub = self.arcs["hub"].to_numpy()[arcs]
+        flow = self.fixed[skus, None] + self.duty[np.ix_(skus, hub)] + self.weight_kg[skus, None] * rates[arcs][None, :]
+        unmet = np.broadcast_to(self.unit_cost[skus, None] * UNSERVED_COST_MULTIPLE, (len(skus), len(self.hubs)))
+        return flow, unmet
+
+    def _solve(self, skus, arcs, rates):
+        n_sku, n_arc, n_hub = len(skus), len(arcs), len(self.hubs)
+        flow_cost, unmet_cost = self._costs(skus, arcs, rates)
+        demand = self.demand[skus]
+        if n_arc == 0:
+            return {"flow": np.zeros((n_sku, 0)), "unmet": demand.copy(), "reduced_cost": np.zeros((n_sku, 0))}
+
+        # x[s, a] at s * n_arc + a, then unmet[s, h] at n_sku * n_arc + s * n_hub + h
+        n_flow = n_sku * n_arc
+        sku_of = np.repeat(np.arange(n_sku), n_arc)
+        arc_of = np.tile(np.arange(n_arc), n_sku)
+        row_of = sku_of * n_hub + self.arcs["hub"].to_numpy()[arcs][arc_of]
+        meets = sp.hstack([
+            sp.csr_array((np.ones(n_flow), (row_of, np.arange(n_flow))), shape=(n_sku * n_hub, n_flow)),
+            sp.identity(n_sku * n_hub, format="csr"),
+        ], format="csr")
+        node, origin_of = np.unique(self.arcs["origin"].to_numpy()[arcs], return_inverse=True)
+        ships = sp.csr_array((np.ones(n_flow), (origin_of[arc_of], np.arange(n_flow))), shape=(len(node), n_flow + n_sku * n_hub))
+
+        res = linprog(
+            np.concatenate([flow_cost.ravel(), unmet_cost.ravel()]),
+            A_ub=ships, b_ub=self.capacity[node],
+            A_eq=meets, b_eq=demand.ravel(),
+            bounds=(0, None), method="highs",
+        )
+        if not res.success:
+            raise RuntimeError(f"network flow LP failed: {res.message}")
+        return {
+            "flow": res.x[:n_flow].reshape(n_sku, n_arc),
+            "unmet": res.x[n_flow:].reshape(n_sku, n_hub),
+            "reduced_cost": res.lower.marginals[:n_flow].reshape(n_sku, n_arc),
+        }
+
+    def with_lane_rate(self, table, lane, column, quote):
+        """A copy re-priced with one FREIGHT_RATES quote changed.
+
+        Only blocks with an arc on that lane are looked at. A block whose
+        arcs on the lane carry no flow and keep a non-negative reduced cost
+        is still optimal and is reused; any other is re-solved. `resolved`
+        lists the blocks (by their origin nodes) that were.
+        """
+        hit = ((self.arcs["table"] == table) & (self.arcs["lane"] == lane) & (self.arcs["column"] == column)).to_numpy()
+        new_rate = lane_quote_per_kg(table, quote)
+        delta = new_rate - self.arcs["rate_per_kg"].to_numpy()
+        new = copy.copy(self)
+        new.arcs = self.arcs.assign(rate_per_kg=np.where(hit, new_rate, self.arcs["rate_per_kg"]))
+        new._solutions = list(self._solutions)
+        new.resolved = []
+        rates = new.arcs["rate_per_kg"].to_numpy(dtype=np.float64)
+
+        for b, (skus, arcs) in enumerate(self._blocks):
+            on_lane = hit[arcs]
+            if not on_lane.any():
+                continue
+            solution = self._solutions[b]
+            shift = self.weight_kg[skus, None] * delta[arcs][on_lane][None, :]
+            reduced = solution["reduced_cost"][:, on_lane] + shift
+            if not solution["flow"][:, on_lane].any() and (reduced >= -REDUCED_COST_TOLERANCE).all():
+                kept = dict(solution, reduced_cost=solution["reduced_cost"].copy())
+                kept["reduced_cost"][:, on_lane] = reduced
+                new._solutions[b] = kept
+                continue
+            new._solutions[b] = new._solve(skus, arcs, rates)
+            new.resolved.append(self.block_names[b])
+        return new
+
+    def _arc_totals(self):
+        """Units and landed cost carried by each arc, summed over SKUs."""
+        units = np.zeros(len(self.arcs))
+        landed = np.zeros(len(self.arcs))
+        rates = self.arcs["rate_per_kg"].to_numpy(dtype=np.float64)
+        for (skus, arcs), solution in zip(self._blocks, self._solutions):
+            if len(arcs):
+                flow_cost, _ = self._costs(skus, arcs, rates)
+                units[arcs] += solution["flow"].sum(axis=0)
+                landed[arcs] += (solution["flow"] * flow_cost).sum(axis=0)
+        return units, landed
+
+    def flows(self):
+        """Arcs carrying flow: origin, hub, mode, lane, annual units and landed cost."""
+        units, landed = self._arc_totals()
+        used = units > 0
+        arcs = self.arcs[used]
+        return pd.DataFrame({
+            "origin": self.origins["node"].to_numpy()[arcs["origin"]],
+            "hub": self.hubs["hub"].to_numpy()[arcs["hub"]],
+            "mode": arcs["mode"].to_numpy(),
+            "lane": arcs["lane"].to_numpy(),
+            "rate_per_kg": arcs["rate_per_kg"].to_numpy(),
+            "units": units[used],
+            "landed_cost": landed[used],
+        }).sort_values("units", ascending=False, ignore_index=True)
+
+    def sku_flows(self):
+        """Annual units per SKU × arc carrying flow, with the arc's origin, hub, mode and lane."""
+        sku, arc, units = [], [], []
+        for (skus, arcs), solution in zip(self._blocks, self._solutions):
+            s, a = np.nonzero(solution["flow"] > 0)
+            sku.append(skus[s])
+            arc.append(arcs[a])
+            units.append(solution["flow"][s, a])
+        sku, arc, units = np.concatenate(sku), np.concatenate(arc), np.concatenate(units)
+        arcs = self.arcs.iloc[arc]
+        return pd.DataFrame({
+            "part_number": self.parts["part_number"].to_numpy()[sku],
+            "origin": self.origins["node"].to_numpy()[arcs["origin"]],
+            "hub": self.hubs["hub"].to_numpy()[arcs["hub"]],
+            "mode": arcs["mode"].to_numpy(),
+            "table": arcs["table"].to_numpy(),
+            "lane": arcs["lane"].to_numpy(),
+            "units": units,
+        })
+
+    def unmet(self):
+        """[sku, hub] annual demand no lane can serve."""
+        unmet = np.zeros_like(self.demand)
+        for (skus, _), solution in zip(self._blocks, self._solutions):
+            unmet[skus] = solution["unmet"]
+        return unmet
+
+    def hub_service(self):
+        """Annual demand, served and unmet units per hub."""
+        demand = self.demand.sum(axis=0)
+        unmet = self.unmet().sum(axis=0)
+        return self.hubs[["hub", "name"]].assign(demand_units=demand, served_units=demand - unmet, unmet_units=unmet)
+
+    def origin_load(self):
+        """Annual units shipped vs. capacity per origin."""
+        units, _ = self._arc_totals()
+        shipped = np.bincount(self.arcs["origin"].to_numpy(dtype=np.int64), weights=units, minlength=len(self.origins))
+        return self.origins[["node", "name", "origin"]].assign(
+            capacity_units=self.capacity,
+            shipped_units=shipped,
+            utilization=shipped / np.where(self.capacity > 0, self.capacity, np.nan),
+        )
+
+    @property
+    def landed_cost(self):
+        """Annual landed cost of all served demand."""
+        return float(self._arc_totals()[1].sum())
@@ -0,0 +1,149 @@
+"""
+Right-to-repair obligation engine - binding support-end dates.
+
+Every SKU × market × model-year cohort carries a parts-availability
+obligation. It ends at the latest of the manufacturer baseline (lifecycle
+support after discontinuation) and every law in force in that market (term
+picked by price band, applicable only to cohorts sold after the effective
+date). The full cube is built with broadcasting, then sorted by end date so
+"what expires in this window" is two binary searches.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Market code -> jurisdiction as written in RIGHT_TO_REPAIR_LAWS
+MARKET_JURISDICTIONS = {
+    "US-CA": "California, USA",
+    "US-NY": "New York, USA",
+    "US-CO": "Colorado, USA",
+    "US-TX": "Texas, USA",
+    "US-UT": "Utah, USA",
+    "EU-DE": "European Union",
+    "EU-FR": "European Union",
+    "EU-NL": "European Union",
+    "EU-IT": "European Union",
+    "EU-ES": "European Union",
+    "UK": "United Kingdom",
+    "CA-BC": "British Columbia, Canada",
+    "AU": "Australia",
+    "JP": "Japan",
+}
+
+# Price bands (requirement key, lower bound $) from the CA SB-244 schedule; "minimum_years" has no band
+PRICE_BAND_KEYS = [("products_over_100", 100.0), ("products_50_to_100", 50.0)]
+PARTS_RETAIL_MARKUP = 2.0  # SKU retail price when the catalog has no msrp column
+DEFAULT_SUPPORT_MONTHS = 84
+BASELINE_RULE = "Manufacturer lifecycle"
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def _days(dates):
+    return (pd.to_datetime(dates).to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int32)
+
+
+def _day(date):
+    # int32 like the index itself: a Python int would make searchsorted upcast the whole array
+    return np.int32((np.datetime64(pd.Timestamp(date).date(), "D") - _EPOCH).astype(np.int64))
+
+
+def _add_years(days, years):
+    return days + np.rint(np.asarray(years) * 365.25).astype(np.int32)
+
+
+def law_terms(laws, price):
+    """Support years per law for each SKU price (0 where the law sets no term for that band)."""
+    price = np.asarray(price, dtype=np.float64)
+    terms = np.zeros((len(laws), len(price)), dtype=np.float64)
+    for k, law in enumerate(laws.values()):
+        req = law["requirements"]
+        if "minimum_years" in req:
+            terms[k] = req["minimum_years"]
+            continue
+        for key, lower in reversed(PRICE_BAND_KEYS):  # narrowest band first, wider bands overwrite
+            if key in req:
+                terms[k] = np.where(price >= lower, req[key], terms[k])
+    return terms
+
+
+class ObligationIndex:
+    """SKU × market × cohort obligations sorted by binding support-end date.
+
+    `skus` needs part_number plus optional msrp (else unit_cost ×
+    PARTS_RETAIL_MARKUP), support_months and discontinuation_date. A cohort
+    is placed on the market on the last day of its model year.
+    """
+
+    def __init__(self, skus, markets, model_years, laws, market_jurisdictions=MARKET_JURISDICTIONS):
+        self.skus = pd.Index(skus["part_number"].astype(str))
+        self.markets = pd.Index(markets)
+        self.model_years = np.asarray(model_years, dtype=np.int16)
+        self.rules = pd.Index([BASELINE_RULE] + [law["name"] for law in laws.values()])
+
+        price = skus["msrp"] if "msrp" in skus else skus["unit_cost"] * PARTS_RETAIL_MARKUP
+        support_months = skus["support_months"] if "support_months" in skus else pd.Series(DEFAULT_SUPPORT_MONTHS, index=skus.index)
+        placed = _days([f"{y}-12-31" for y in self.model_years])  # [cohort]
+
+        # Baseline [sku, cohort]: support runs from the later of discontinuation and cohort placement
+        discontinued = pd.to_datetime(skus["discontinuation_date"], errors="coerce") if "discontinuation_date" in skus else pd.Series(pd.NaT, index=skus.index)
+        disc_days = _days(discontinued.fillna(pd.Timestamp(_EPOCH)))  # undated SKUs: placement decides
+        start = np.maximum(disc_days[:, None], placed[None, :])
+        best = _add_years(start, support_months.to_numpy(dtype=np.float64)[:, None] / 12)[:, None, :]  # [sku, 1, cohort]
+        rule = np.zeros((len(skus), len(self.markets), len(self.model_years)), dtype=np.int8)
+        best = np.broadcast_to(best, rule.shape).copy()
+
+        # Laws [law, sku] terms; in force per [law, market, cohort]
+        terms = law_terms(laws, price)
+        effective = _days([law["effective_date"] for law in laws.values()])
+        for k, law in enumerate(laws.values()):
+            in_market = np.array([market_jurisdictions.get(m) == law["jurisdiction"] for m in self.markets])
+            applies = in_market[:, None] & (placed[None, :] >= effective[k])  # [market, cohort]
+            law_end = _add_years(placed[None, None, :], terms[k][:, None, None])  # [sku, 1, cohort]
+            # A law that matches the baseline is still reported as the binding obligation
+            binds = applies[None, :, :] & (terms[k][:, None, None] > 0) & (law_end >= best)
+            best = np.where(binds, law_end, best)
+            rule[binds] = k + 1
+
+        # Flatten and sort by end date (the interval index)
+        order = np.argsort(best, axis=None, kind="stable")
+        self._end = best.ravel()[order]
+        self._rule = rule.ravel()[order]
+        self._order = order.astype(np.int64)
+        self._shape = best.shape
+        self._start = np.broadcast_to(placed, best.shape).ravel()[order]
+
+    def __len__(self):
+        return len(self._end)
+
+    def _bounds(self, start, end):
+        lo = np.searchsorted(self._end, _day(start), side="left")
+        hi = np.searchsorted(self._end, _day(end), side="right")
+        return int(lo), int(max(hi, lo))
+
+    def _frame(self, rows):
+        sku, market, cohort = np.unravel_index(self._order[rows], self._shape)
+        return pd.DataFrame({
+            "part_number": self.skus[sku],
+            "market": pd.Categorical.from_codes(market, self.markets),
+            "model_year": self.model_years[cohort],
+            "support_end": _EPOCH + self._end[rows].astype("timedelta64[D]"),
+            "binding_rule": pd.Categorical.from_codes(self._rule[rows], self.rules),
+        })
+
+    def count_expiring(self, start, end):
+        """Number of obligations whose support ends between start and end (inclusive)."""
+        lo, hi = self._bounds(start, end)
+        return hi - lo
+
+    def expiring(self, start, end):
+        """Obligations whose support ends between start and end (inclusive), earliest first."""
+        lo, hi = self._bounds(start, end)
+        return self._frame(slice(lo, hi))
+
+    def active_on(self, date):
+        """Obligations placed on or before `date` whose support has not yet ended."""
+        day = _day(date)
+        lo = int(np.searchsorted(self._end, day, side="left"))
+        placed = np.flatnonzero(self._start[lo:] <= day) + lo
+        return self._frame(placed)
@@ -0,0 +1,145 @@
+"""
+Service parts inventory - vectorized builder.
+
+Derives inventory, demand and landed-cost columns for the service parts
+catalog with array operations only, so the 30-part demo catalog and an
+80k-SKU load-test catalog go through the same code path.
+"""
+
+import numpy as np
+import pandas as pd
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SEED CATALOG (REAL SUPPLIERS, LEAD TIMES & COSTS)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+SEED_PARTS = [
+    # ═══════════════════════════════════════════════════════════════════════════
+    # MOTORS - By Supplier with Real Lead Times & Costs
+    # ═══════════════════════════════════════════════════════════════════════════
+
+    # Specialized In-House (Full Power System)
+    {"part_number": "MOT-FP22-001", "description": "Full Power 2.2 Motor Assembly", "category": "Motor", "supplier": "Specialized In-House", "origin": "Taiwan", "unit_cost": 1450, "hazmat": False, "lead_time_days": 75, "tariff_code": "taiwan_parts", "weight_kg": 2.95, "obsolescence_risk": "LOW"},
+    {"part_number": "MOT-FP20-001", "description": "Full Power 2.0 Motor Assembly", "category": "Motor", "supplier": "Specialized In-House", "origin": "Taiwan", "unit_cost": 1150, "hazmat": False, "lead_time_days": 90, "tariff_code": "taiwan_parts", "weight_kg": 3.1, "obsolescence_risk": "MEDIUM"},
+
+    # MAHLE Motors (SL System) - Germany
+    {"part_number": "MOT-SL12-001", "description": "MAHLE SL 1.2 Motor Assembly", "category": "Motor", "supplier": "MAHLE", "origin": "Germany", "unit_cost": 1100, "hazmat": False, "lead_time_days": 60, "tariff_code": "germany_motors", "weight_kg": 1.95, "obsolescence_risk": "LOW"},
+    {"part_number": "MOT-SL11-001", "description": "MAHLE SL 1.1 Motor Assembly", "category": "Motor", "supplier": "MAHLE", "origin": "Germany", "unit_cost": 950, "hazmat": False, "lead_time_days": 75, "tariff_code": "germany_motors", "weight_kg": 1.85, "obsolescence_risk": "MEDIUM"},
+
+    # Shimano Motors - Japan
+    {"part_number": "MOT-EP8-001", "description": "Shimano EP8 Motor Assembly", "category": "Motor", "supplier": "Shimano", "origin": "Japan", "unit_cost": 890, "hazmat": False, "lead_time_days": 75, "tariff_code": "japan_motors", "weight_kg": 2.6, "obsolescence_risk": "LOW"},
+    {"part_number": "MOT-E7K-001", "description": "Shimano E7000 Motor Assembly", "category": "Motor", "supplier": "Shimano", "origin": "Japan", "unit_cost": 720, "hazmat": False, "lead_time_days": 60, "tariff_code": "japan_motors", "weight_kg": 2.8, "obsolescence_risk": "LOW"},
+
+    # Bafang Motors - China (HIGH TARIFF RISK)
+    {"part_number": "MOT-BAF-M400", "description": "Bafang M400 Motor Assembly", "category": "Motor", "supplier": "Bafang", "origin": "China", "unit_cost": 380, "hazmat": False, "lead_time_days": 45, "tariff_code": "china_parts", "weight_kg": 2.9, "obsolescence_risk": "MEDIUM", "tariff_alert": "SECTION 301 EXPOSURE"},
+    {"part_number": "MOT-BAF-M500", "description": "Bafang M500 Motor Assembly", "category": "Motor", "supplier": "Bafang", "origin": "China", "unit_cost": 420, "hazmat": False, "lead_time_days": 45, "tariff_code": "china_parts", "weight_kg": 3.0, "obsolescence_risk": "MEDIUM", "tariff_alert": "SECTION 301 EXPOSURE"},
+
+    # LEGACY Brose Motors - Germany (CRITICAL FOR WARRANTY)
+    {"part_number": "MOT-BROSE-DSM", "description": "Brose Drive S Mag Motor (LEGACY)", "category": "Motor", "supplier": "Brose (LEGACY)", "origin": "Germany", "unit_cost": 1380, "hazmat": False, "lead_time_days": 120, "tariff_code": "germany_motors", "weight_kg": 2.9, "obsolescence_risk": "CRITICAL", "legacy_support": True, "discontinuation_date": "2022-06-30", "support_end_date": "2029-06-30"},
+    {"part_number": "MOT-BROSE-DS", "description": "Brose Drive S Motor (LEGACY)", "category": "Motor", "supplier": "Brose (LEGACY)", "origin": "Germany", "unit_cost": 1250, "hazmat": False, "lead_time_days": 150, "tariff_code": "germany_motors", "weight_kg": 3.4, "obsolescence_risk": "CRITICAL", "legacy_support": True, "discontinuation_date": "2021-03-31", "support_end_date": "2028-03-31"},
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # BATTERIES - By Chemistry and Capacity
+    # ═══════════════════════════════════════════════════════════════════════════
+    {"part_number": "BAT-700-NMC811", "description": "700Wh Battery Pack (NMC 811)", "category": "Battery", "supplier": "Samsung SDI", "origin": "South Korea", "unit_cost": 945, "hazmat": True, "lead_time_days": 60, "tariff_code": "taiwan_parts", "weight_kg": 4.4, "eu_passport_required": True, "chemistry": "NMC 811"},
+    {"part_number": "BAT-710-NMC622", "description": "710Wh Battery Pack (NMC 622)", "category": "Battery", "supplier": "LG Energy", "origin": "South Korea", "unit_cost": 890, "hazmat": True, "lead_time_days": 55, "tariff_code": "taiwan_parts", "weight_kg": 4.6, "eu_passport_required": True, "chemistry": "NMC 622"},
+    {"part_number": "BAT-320-SL", "description": "320Wh SL Battery Pack", "category": "Battery", "supplier": "Samsung SDI", "origin": "South Korea", "unit_cost": 580, "hazmat": True, "lead_time_days": 45, "tariff_code": "taiwan_parts", "weight_kg": 1.95, "eu_passport_required": True, "chemistry": "NMC 811"},
+    {"part_number": "BAT-545-STD", "description": "545Wh Standard Battery Pack", "category": "Battery", "supplier": "CATL", "origin": "China", "unit_cost": 520, "hazmat": True, "lead_time_days": 50, "tariff_code": "china_batteries", "weight_kg": 3.5, "eu_passport_required": True, "chemistry": "NMC 622", "tariff_alert": "SECTION 301 EXPOSURE"},
+    {"part_number": "BAT-160-EXT", "description": "160Wh Range Extender", "category": "Battery", "supplier": "Samsung SDI", "origin": "South Korea", "unit_cost": 350, "hazmat": True, "lead_time_days": 30, "tariff_code": "taiwan_parts", "weight_kg": 1.0, "eu_passport_required": True, "chemistry": "NMC 811"},
+
+    # LEGACY Batteries
+    {"part_number": "BAT-700-LEGACY", "description": "700Wh Battery Pack (Gen 3 Legacy)", "category": "Battery", "supplier": "Samsung SDI", "origin": "South Korea", "unit_cost": 1050, "hazmat": True, "lead_time_days": 90, "tariff_code": "taiwan_parts", "weight_kg": 4.8, "eu_passport_required": True, "chemistry": "NMC 622", "legacy_support": True, "discontinuation_date": "2023-01-01", "support_end_date": "2030-01-01"},
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # ELECTRONICS - TCU, Displays, Sensors
+    # ═══════════════════════════════════════════════════════════════════════════
+    {"part_number": "TCU-G5-001", "description": "Turbo Connect Unit Gen 5 (MasterMind)", "category": "Electronics", "supplier": "Specialized In-House", "origin": "Taiwan", "unit_cost": 320, "hazmat": False, "lead_time_days": 45, "tariff_code": "taiwan_parts", "weight_kg": 0.12, "obsolescence_risk": "HIGH"},
+    {"part_number": "TCU-G4-001", "description": "Turbo Connect Unit Gen 4", "category": "Electronics", "supplier": "Specialized In-House", "origin": "Taiwan", "unit_cost": 280, "hazmat": False, "lead_time_days": 60, "tariff_code": "taiwan_parts", "weight_kg": 0.11, "obsolescence_risk": "MEDIUM"},
+    {"part_number": "TCU-G3-001", "description": "Turbo Connect Unit Gen 3 (LEGACY)", "category": "Electronics", "supplier": "Specialized In-House", "origin": "Taiwan", "unit_cost": 250, "hazmat": False, "lead_time_days": 90, "tariff_code": "taiwan_parts", "weight_kg": 0.13, "obsolescence_risk": "CRITICAL", "legacy_support": True},
+    {"part_number": "DSP-RMT-002", "description": "Remote Control Unit (Handlebar)", "category": "Electronics", "supplier": "Giant Manufacturing", "origin": "Taiwan", "unit_cost": 125, "hazmat": False, "lead_time_days": 30, "tariff_code": "taiwan_parts", "weight_kg": 0.045},
+    {"part_number": "SNS-SPD-001", "description": "Speed Sensor Assembly", "category": "Electronics", "supplier": "Giant Manufacturing", "origin": "Taiwan", "unit_cost": 48, "hazmat": False, "lead_time_days": 21, "tariff_code": "taiwan_parts", "weight_kg": 0.025},
+    {"part_number": "SNS-TRQ-001", "description": "Torque Sensor Assembly", "category": "Electronics", "supplier": "MAHLE", "origin": "Germany", "unit_cost": 185, "hazmat": False, "lead_time_days": 45, "tariff_code": "germany_motors", "weight_kg": 0.15},
+    {"part_number": "CBL-PWR-MAIN", "description": "Main Power Harness Assembly", "category": "Electronics", "supplier": "TE Connectivity", "origin": "Mexico", "unit_cost": 95, "hazmat": False, "lead_time_days": 21, "tariff_code": "vietnam_parts", "weight_kg": 0.35},
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # CHARGERS
+    # ═══════════════════════════════════════════════════════════════════════════
+    {"part_number": "CHG-4A-STD", "description": "4A Smart Charger (Standard)", "category": "Charger", "supplier": "Delta Electronics", "origin": "Taiwan", "unit_cost": 165, "hazmat": False, "lead_time_days": 21, "tariff_code": "taiwan_parts", "weight_kg": 0.65},
+    {"part_number": "CHG-6A-FAST", "description": "6A Fast Charger (Turbo)", "category": "Charger", "supplier": "Delta Electronics", "origin": "Taiwan", "unit_cost": 285, "hazmat": False, "lead_time_days": 28, "tariff_code": "taiwan_parts", "weight_kg": 0.95},
+    {"part_number": "CHG-SL-COMP", "description": "SL Compact Charger (48V/2A)", "category": "Charger", "supplier": "Delta Electronics", "origin": "Taiwan", "unit_cost": 125, "hazmat": False, "lead_time_days": 21, "tariff_code": "taiwan_parts", "weight_kg": 0.35},
+]
+
+# (legacy low, legacy high, standard low, standard high) on-hand units per hub.
+# Legacy parts carry more stock to meet the 7-year obligation.
+ON_HAND_RANGES = {
+    "on_hand_slc": (200, 800, 50, 400),
+    "on_hand_reno": (100, 500, 30, 250),
+    "on_hand_eu": (150, 600, 40, 300),
+}
+
+HOLDING_COST_ANNUAL_PCT = 0.25
+STOCKOUT_PENALTY_PCT = 0.4  # 40% penalty for expedite
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# VECTORIZED BUILDER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def build_parts_inventory(parts, tariff_rates, seed=42):
+    """Add inventory, demand, financial and landed-cost columns to a parts catalog.
+
+    `tariff_rates` maps tariff_code to total duty %; unknown codes get 0%.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(parts).reset_index(drop=True)
+    n = len(df)
+
+    legacy = df["legacy_support"].eq(True).to_numpy() if "legacy_support" in df else np.zeros(n, dtype=bool)
+
+    for col, (legacy_lo, legacy_hi, std_lo, std_hi) in ON_HAND_RANGES.items():
+        df[col] = np.where(legacy, rng.integers(legacy_lo, legacy_hi, n), rng.integers(std_lo, std_hi, n))
+    df["on_hand_apac"] = rng.integers(20, 150, n)
+
+    # Realistic demand patterns
+    df["monthly_demand_us"] = rng.integers(15, 120, n)
+    df["monthly_demand_eu"] = rng.integers(10, 80, n)
+    df["monthly_demand_apac"] = rng.integers(5, 40, n)
+    df["warranty_claims_mtd"] = rng.integers(3, 45, n)
+    df["production_allocation"] = rng.integers(50, 400, n)
+
+    # Financial metrics
+    df["holding_cost_annual_pct"] = HOLDING_COST_ANNUAL_PCT
+    df["stockout_cost_per_unit"] = df["unit_cost"] * STOCKOUT_PENALTY_PCT
+
+    # Calculate totals and days of supply
+    df["on_hand_us"] = df["on_hand_slc"] + df["on_hand_reno"]  # For backward compatibility
+    df["total_on_hand"] = df["on_hand_slc"] + df["on_hand_reno"] + df["on_hand_eu"] + df["on_hand_apac"]
+    df["monthly_demand"] = df["monthly_demand_us"] + df["monthly_demand_eu"] + df["monthly_demand_apac"]
+    df["days_of_supply"] = (df["total_on_hand"] / (df["monthly_demand"] / 30)).round(0)
+
+    # Landed cost (base + tariff under the given scenario)
+    df["tariff_rate_pct"] = df["tariff_code"].map(tariff_rates).fillna(0).astype(float)
+    df["landed_cost"] = (df["unit_cost"] * (1 + df["tariff_rate_pct"] / 100)).round(2)
+
+    return df
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SYNTHETIC CATALOG EXPANDER (LOAD TESTING)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def expand_parts_catalog(parts, n, seed=42, jitter=0.15):
+    """Grow a seed catalog to `n` SKUs by resampling seed parts with jittered cost, lead time and weight.
+
+    Each synthetic SKU keeps its template's category, supplier, origin and tariff
+    code and gets a unique part number `<template>-S<k>`.
+    """
+    rng = np.random.default_rng(seed)
+    seed_df = pd.DataFrame(parts).reset_index(drop=True)
+    template = rng.integers(0, len(seed_df), n)
+
+    df = seed_df.iloc[template].reset_index(drop=True)
+    df["part_number"] = df["part_number"] + "-S" + pd.Series(np.arange(n)).astype(str).str.zfill(len(str(n)))
+    df["unit_cost"] = (df["unit_cost"] * rng.uniform(1 - jitter, 1 + jitter, n)).round(2)
+    df["lead_time_days"] = np.maximum((df["lead_time_days"] * rng.uniform(1 - jitter, 1 + jitter, n)).round(), 1).astype(int)
+    df["weight_kg"] = (df["weight_kg"] * rng.uniform(1 - jitter, 1 + jitter, n)).round(3)
+    return df
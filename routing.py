@@ -0,0 +1,156 @@
+"""
+Multimodal routing engine - cost × transit-time Pareto routes.
+
+Ocean, air and China-EU rail lanes from FREIGHT_RATES plus first- and
+last-mile inland legs form one directed graph over network nodes, freight
+gateways and hubs. A multi-criteria label-setting search from each origin
+keeps every route that no other route beats on both freight $/kg and
+transit days, giving the Pareto set for each origin → hub pair. Route
+tables are keyed by rate_version, a digest of the rate inputs, so callers
+can cache all-pairs results per rate version.
+"""
+
+import hashlib
+import heapq
+import json
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from landed_cost import FREIGHT_MODES, network_hubs, network_origins
+from network_flow import lane_quote_per_kg
+
+MAX_LEGS = 5  # first mile + up to three line-haul / transshipment legs + last mile
+
+
+def rate_version(freight_rates, inland_legs):
+    """Stable digest of the rate inputs, for cache keys."""
+    payload = json.dumps({"freight_rates": freight_rates, "inland_legs": inland_legs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def lane_transit_days(quote, column):
+    """Transit days for one rate column of a FREIGHT_RATES lane (`<column>_transit_days`, else transit_days)."""
+    return quote.get(f"{column}_transit_days", quote.get("transit_days"))
+
+
+def route_legs(freight_rates, inland_legs, modes=FREIGHT_MODES):
+    """One row per directed leg: FREIGHT_RATES lanes per mode and inland legs.
+
+    FREIGHT_RATES keys are "<from>_<to>" gateways. Lanes without a transit
+    time are left out.
+    """
+    rows = []
+    for mode, (table, column) in modes.items():
+        for lane, quote in freight_rates.get(table, {}).items():
+            days = lane_transit_days(quote, column)
+            if column in quote and days is not None:
+                src, dst = lane.split("_", 1)
+                rows.append({"src": src, "dst": dst, "mode": mode, "lane": lane,
+                             "rate_per_kg": lane_quote_per_kg(table, quote[column]), "days": float(days)})
+    for src, destinations in inland_legs.items():
+        for dst, legs in destinations.items():
+            for mode, leg in legs.items():
+                rows.append({"src": src, "dst": dst, "mode": mode, "lane": f"{src}_{dst}",
+                             "rate_per_kg": float(leg["per_kg"]), "days": float(leg["days"])})
+    return pd.DataFrame(rows, columns=["src", "dst", "mode", "lane", "rate_per_kg", "days"])
+
+
+def _dominated(labels, cost, days, legs):
+    return any(c <= cost and d <= days and len(path) <= legs for c, d, path in labels)
+
+
+def _front(labels):
+    """The cost × days Pareto front of labels already sorted by (cost, days)."""
+    front, fastest = [], np.inf
+    for label in labels:
+        if label[1] < fastest:
+            front.append(label)
+            fastest = label[1]
+    return front
+
+
+def pareto_routes(legs, source, max_legs=MAX_LEGS):
+    """Non-dominated (cost $/kg, days, leg indices) labels from `source` to every reachable node.
+
+    A label is pruned only by a settled label at the same node that is no
+    worse on cost, days and legs used, so a dearer prefix with legs to spare
+    under max_legs survives. Paths never revisit a node; with non-negative
+    costs and days that never loses a route, as cutting out the cycle gives
+    one at least as good on all three. Each node's labels are then reduced
+    to the exact cost × days front over routes of at most max_legs legs.
+    """
+    src, dst = legs["src"].to_numpy(), legs["dst"].to_numpy()
+    rate, days = legs["rate_per_kg"].to_numpy(dtype=np.float64), legs["days"].to_numpy(dtype=np.float64)
+    out = defaultdict(list)
+    for e, node in enumerate(src):
+        out[node].append(e)
+
+    settled = defaultdict(list)
+    heap = [(0.0, 0.0, 0, source, ())]
+    while heap:
+        cost, elapsed, n_legs, node, path = heapq.heappop(heap)
+        if _dominated(settled[node], cost, elapsed, n_legs):
+            continue
+        settled[node].append((cost, elapsed, path))
+        if n_legs == max_legs:
+            continue
+        visited = {source, *dst[list(path)]}
+        for e in out[node]:
+            nxt, c, d = dst[e], cost + rate[e], elapsed + days[e]
+            if nxt not in visited and not _dominated(settled[nxt], c, d, n_legs + 1):
+                heapq.heappush(heap, (c, d, n_legs + 1, nxt, path + (e,)))
+    return {node: _front(labels) for node, labels in settled.items()}
+
+
+class RouteTable:
+    """All-pairs Pareto routes from every network origin to every hub.
+
+    Route cost is freight $/kg along the legs, so the same front holds for
+    every SKU (per-unit freight is weight × cost_per_kg). total_days adds
+    the origin's lead_time_days to transit.
+    """
+
+    def __init__(self, network, freight_rates, inland_legs, modes=FREIGHT_MODES, max_legs=MAX_LEGS):
+        self.version = rate_version(freight_rates, inland_legs)
+        self.origins = network_origins(network)
+        self.hubs = network_hubs(network)
+        self.legs = route_legs(freight_rates, inland_legs, modes)
+        lead = {key: spec.get("lead_time_days", 0) for group in network.values() for key, spec in group.items()}
+
+        mode, dst, lane = (self.legs[c].to_numpy() for c in ("mode", "dst", "lane"))
+        rows = []
+        hub_keys = set(self.hubs["hub"])
+        for origin in self.origins["node"]:
+            for hub, labels in pareto_routes(self.legs, origin, max_legs).items():
+                if hub not in hub_keys:
+                    continue
+                for route, (cost, days, path) in enumerate(sorted(labels)):
+                    path = list(path)
+                    rows.append((origin, hub, route, cost, days, days + lead[origin], len(path),
+                                 " › ".join(mode[path]), " → ".join([origin, *dst[path]]), " › ".join(lane[path])))
+        self.table = pd.DataFrame(rows, columns=["origin", "hub", "route", "cost_per_kg", "transit_days", "total_days",
+                                                 "legs", "modes", "path", "lanes"])
+        # Per-pair fronts are sliced once so route questions are a dict lookup
+        self._fronts = {pair: front.reset_index(drop=True) for pair, front in self.table.groupby(["origin", "hub"], sort=False)}
+        self._empty = self.table.iloc[:0]
+
+    def pareto(self, origin, hub):
+        """Pareto routes for one origin → hub pair, cheapest first (empty when the hub is unreachable)."""
+        return self._fronts.get((origin, hub), self._empty)
+
+    def cheapest_within(self, origin, hub, max_days, weight_kg=1.0):
+        """Cheapest route arriving within max_days of transit, with freight for one unit of `weight_kg`; None if none does."""
+        routes = self.pareto(origin, hub)
+        fits = routes[routes["transit_days"] <= max_days]
+        if fits.empty:
+            return None
+        best = fits.iloc[0].to_dict()  # Pareto front is sorted by cost
+        best["freight_per_unit"] = best["cost_per_kg"] * weight_kg
+        return best
+
+    def unreachable(self):
+        """Origin × hub pairs with no route."""
+        pairs = pd.MultiIndex.from_product([self.origins["node"], self.hubs["hub"]], names=["origin", "hub"])
+        return pairs[~pairs.isin(list(self._fronts))].to_frame(index=False)
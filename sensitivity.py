@@ -0,0 +1,58 @@
+"""
+Right-to-Repair sensitivity - closed-form Weibull failure and capital math.
+
+For one component family the expected-failure curve and the capital
+lock-up are evaluated straight from the Weibull CDF. The closed form is a
+few microseconds per slider move and exact, so nothing is tabulated; the
+β × η sensitivity heatmap is the same expression broadcast over axes that
+span the forecaster sliders.
+"""
+
+import numpy as np
+
+# Heatmap axes span the forecaster slider ranges
+SHAPE_GRID = np.round(np.arange(0.5, 3.0 + 1e-9, 0.1), 2)
+SCALE_GRID = np.round(np.arange(2.0, 10.0 + 1e-9, 0.25), 2)
+PERIODS_PER_YEAR = 4
+
+
+def service_buffer(service_level_pct):
+    """Parts-required multiplier on expected failures: +1% per point of service level above 85%."""
+    return 1 + (np.asarray(service_level_pct, dtype=np.float64) - 85) / 100
+
+
+def failure_share(years, shape, scale):
+    """Weibull CDF at `years`; shape and scale broadcast against it."""
+    return -np.expm1(-(np.asarray(years, dtype=np.float64) / scale) ** shape)
+
+
+class SensitivitySurface:
+    """Expected-failure and capital lock-up for one component family over its support horizon.
+
+    Every figure scales linearly with install base, so methods return per
+    installed unit. `years` runs in quarters to one year past the horizon.
+    """
+
+    def __init__(self, horizon_years, unit_cost):
+        self.horizon_years = horizon_years
+        self.unit_cost = unit_cost
+        self.years = np.arange(0, horizon_years + 1, 1 / PERIODS_PER_YEAR)
+
+    def failure_curve(self, shape, scale):
+        """Cumulative failure share at every quarter in `years`."""
+        return failure_share(self.years, shape, scale)
+
+    def parts_required(self, shape, scale, service_level_pct):
+        """Parts per installed unit over the horizon at the given service level."""
+        return float(failure_share(self.horizon_years, shape, scale) * service_buffer(service_level_pct))
+
+    def capital_lockup(self, shape, scale, service_level_pct):
+        """Inventory investment per installed unit over the horizon."""
+        return self.parts_required(shape, scale, service_level_pct) * self.unit_cost
+
+    def grid(self, metric, service_level_pct, shapes=SHAPE_GRID, scales=SCALE_GRID):
+        """β × η surface of "failures" (share failed by the horizon) or "capital" (per unit) at one service level."""
+        failed = failure_share(self.horizon_years, shapes[:, None], scales[None, :])
+        if metric == "failures":
+            return failed
+        return failed * service_buffer(service_level_pct) * self.unit_cost
@@ -0,0 +1,73 @@
+"""
+Service network datasets - dealer network and active install base.
+
+Synthetic frames for the Executive Dashboard, Dealer
+Network Health and Right-to-Repair modules.
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DEALER NETWORK & INSTALL BASE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def build_dealer_network():
+    """Generate dealer network performance data."""
+    np.random.seed(42)
+    
+    regions = {
+        "North America": ["US West", "US Central", "US East", "Canada"],
+        "EMEA": ["UK/Ireland", "DACH", "France", "Nordics", "Southern EU"],
+        "APAC": ["Australia/NZ", "Japan", "Taiwan", "Southeast Asia"],
+        "LATAM": ["Brazil", "Mexico", "Chile/Argentina"]
+    }
+    
+    dealers = []
+    for region, sub_regions in regions.items():
+        for sub_region in sub_regions:
+            n_dealers = random.randint(15, 80)
+            for i in range(n_dealers):
+                dealer = {
+                    "dealer_id": f"DLR-{region[:2]}-{str(len(dealers)+1).zfill(4)}",
+                    "region": region,
+                    "sub_region": sub_region,
+                    "tier": random.choices(["Platinum", "Gold", "Silver"], weights=[0.1, 0.3, 0.6])[0],
+                    "e_bike_certified": random.random() > 0.2,
+                    "open_warranty_claims": random.randint(0, 25),
+                    "avg_claim_resolution_days": round(random.uniform(3, 45), 1),
+                    "parts_fill_rate": round(random.uniform(0.75, 0.99), 3),
+                    "pending_reimbursement_usd": round(random.uniform(0, 15000), 2),
+                    "nps_score": random.randint(20, 95),
+                    "ytd_warranty_volume": random.randint(5, 200),
+                }
+                dealers.append(dealer)
+    
+    return pd.DataFrame(dealers)
+
+def build_install_base():
+    """Generate active install base for liability forecasting."""
+    np.random.seed(42)
+    
+    # Install base by model year and model
+    years = list(range(2019, 2026))
+    models = ["Turbo Levo", "Turbo Levo SL", "Turbo Kenevo", "Turbo Vado", "Turbo Como", "Turbo Creo"]
+    
+    install_base = []
+    for year in years:
+        for model in models:
+            # Newer years have more units, e-bike growth curve
+            base_units = int(2000 * (1.35 ** (year - 2019)))
+            units = int(base_units * random.uniform(0.7, 1.3))
+            
+            install_base.append({
+                "model_year": year,
+                "model": model,
+                "active_units": units,
+                "warranty_end_year": year + 5,  # 5 year Turbo warranty
+                "legal_support_end_year": year + 7,  # 7 year right-to-repair
+            })
+    
+    return pd.DataFrame(install_base)
@@ -0,0 +1,168 @@
+"""
+Sourcing-shift optimizer - SKU × source assignment LP.
+
+Each SKU in a category with alternative suppliers can be bought from its
+incumbent or from any network supplier of that category. Landed cost per
+unit is unit cost plus duty under the chosen tariff scenario plus the
+carrying cost of lead-time pipeline stock; each supplier can grow up to its
+capacity share of category volume. The assignment is a transportation LP
+solved per category with HiGHS; the handful of SKUs the LP splits across
+suppliers is then re-solved as a small single-source MILP.
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from parts_inventory import HOLDING_COST_ANNUAL_PCT
+
+SPLIT_TOLERANCE = 1e-6  # LP shares closer than this to 0/1 are integral
+SWITCHING_COST_PCT = 0.03  # first-year requalification and tooling on a moved SKU, share of unit cost
+
+
+def supplier_sources(suppliers, category):
+    """One row per SUPPLY_CHAIN_NETWORK supplier of a parts catalog category."""
+    return pd.DataFrame([{
+        "source": key,
+        "category": category,
+        "supplier": spec["catalog_supplier"],
+        "name": spec["name"],
+        "origin": spec["origin"],
+        "tariff_code": spec["tariff_code"],
+        "unit_cost_mid": float(np.mean(spec["unit_cost_range"])),
+        "lead_time_days": spec["lead_time_days"],
+        "share_pct": spec["share_pct"],
+    } for key, spec in suppliers.items()])
+
+
+def landed_unit_cost(unit_cost, duty_pct, lead_time_days, holding_pct=HOLDING_COST_ANNUAL_PCT):
+    """Unit cost + duty + carrying cost of the lead-time pipeline."""
+    unit_cost = np.asarray(unit_cost, dtype=np.float64)
+    return unit_cost * (1 + np.asarray(duty_pct) / 100 + holding_pct * np.asarray(lead_time_days) / 365)
+
+
+def _solve_assignment(cost, valid, units, source_of, capacity, integral):
+    """min Σ cost·x over valid (sku, column) pairs, one unit of share per SKU, load per source ≤ capacity."""
+    sku, column = np.nonzero(valid)
+    n_vars, n_skus = len(sku), valid.shape[0]
+    var = np.arange(n_vars)
+    capped = source_of[column] >= 0
+
+    one_each = sp.csr_array((np.ones(n_vars), (sku, var)), shape=(n_skus, n_vars))
+    load = sp.csr_array((units[sku[capped]], (source_of[column[capped]], var[capped])), shape=(len(capacity), n_vars))
+    res = milp(
+        cost[sku, column] * units[sku],
+        constraints=[LinearConstraint(one_each, 1, 1), LinearConstraint(load, -np.inf, capacity)],
+        integrality=np.full(n_vars, int(integral)),
+        bounds=Bounds(0, 1),
+    )
+    if not res.success:
+        return None
+    share = np.zeros(valid.shape)
+    share[sku, column] = res.x
+    return share
+
+
+def optimize_sourcing(parts, sources, tariff_rates, capacity_headroom=0.0, switching_cost_pct=SWITCHING_COST_PCT):
+    """Least landed-cost supplier for every SKU in the categories covered by `sources`.
+
+    `parts` needs part_number, category, supplier, origin, tariff_code,
+    unit_cost, lead_time_days and monthly_demand; `sources` comes from
+    supplier_sources. An alternative supplier's unit cost is the SKU's cost
+    scaled by that supplier's price midpoint over the incumbent's (or the
+    share-weighted category midpoint for off-network incumbents) plus
+    switching_cost_pct for requalification. A supplier
+    keeps at least its current volume and may grow to its share_pct of
+    category volume × (1 + capacity_headroom). Legacy-support SKUs stay with
+    their incumbent.
+
+    Returns a dict with one row per SKU × source carrying volume
+    ("assignments"), per-source load vs. capacity ("by_source"), baseline
+    and optimized annual landed cost, and the number of SKUs left split.
+    """
+    legacy = parts["legacy_support"].eq(True) if "legacy_support" in parts else pd.Series(False, index=parts.index)
+    assignments, by_source, split_skus = [], [], 0
+
+    for category, cat_sources in sources.groupby("category", sort=False):
+        in_cat = parts["category"].astype(str).eq(category).to_numpy()
+        cat = parts[in_cat].reset_index(drop=True)
+        locked = legacy[in_cat].to_numpy()
+        n, n_src = len(cat), len(cat_sources)
+        if n == 0:
+            continue
+
+        units = cat["monthly_demand"].to_numpy(dtype=np.float64) * 12
+        unit_cost = cat["unit_cost"].to_numpy(dtype=np.float64)
+        incumbent = pd.Index(cat_sources["supplier"]).get_indexer(cat["supplier"].astype(str))  # -1: off-network
+        mid = cat_sources["unit_cost_mid"].to_numpy(dtype=np.float64)
+        share = cat_sources["share_pct"].to_numpy(dtype=np.float64)
+        ref_mid = np.where(incumbent >= 0, mid[incumbent], np.average(mid, weights=share))
+
+        # Columns 0..n_src-1 are network suppliers, column n_src is the SKU's own off-network incumbent
+        duty = np.array([tariff_rates.get(code, 0.0) for code in cat_sources["tariff_code"]])
+        own_duty = cat["tariff_code"].astype(str).map(tariff_rates).fillna(0.0).to_numpy(dtype=np.float64)
+        own = landed_unit_cost(unit_cost, own_duty, cat["lead_time_days"].to_numpy(dtype=np.float64))
+        cost = np.empty((n, n_src + 1))
+        alt_cost = unit_cost[:, None] * mid / ref_mid[:, None]
+        cost[:, :n_src] = landed_unit_cost(alt_cost, duty, cat_sources["lead_time_days"].to_numpy()) + alt_cost * switching_cost_pct
+        cost[:, n_src] = own
+        is_incumbent = np.zeros((n, n_src + 1), dtype=bool)
+        is_incumbent[np.arange(n), np.where(incumbent >= 0, incumbent, n_src)] = True
+        cost[is_incumbent] = own
+        price = np.column_stack([alt_cost, unit_cost])
+        price[is_incumbent] = unit_cost
+
+        valid = np.zeros_like(is_incumbent)
+        valid[:, :n_src] = ~locked[:, None]
+        valid |= is_incumbent
+        source_of = np.append(np.arange(n_src), -1)
+
+        current_load = np.bincount(incumbent[incumbent >= 0], weights=units[incumbent >= 0], minlength=n_src)
+        capacity = np.maximum(share / 100 * units.sum() * (1 + capacity_headroom), current_load)
+
+        x = _solve_assignment(cost, valid, units, source_of, capacity, integral=False)
+        split = ((x > SPLIT_TOLERANCE) & (x < 1 - SPLIT_TOLERANCE)).any(axis=1)
+        if split.any():
+            # Re-solve the split SKUs single-sourced against what the integral ones left over
+            residual = capacity - (x[~split, :n_src] * units[~split, None]).sum(axis=0)
+            fixed = _solve_assignment(cost[split], valid[split], units[split], source_of, residual, integral=True)
+            if fixed is not None:
+                x[split] = fixed
+        x[x < SPLIT_TOLERANCE] = 0
+        split_skus += int(((x > 0) & (x < 1 - SPLIT_TOLERANCE)).any(axis=1).sum())
+
+        sku, column = np.nonzero(x)
+        network = column < n_src
+        chosen = cat_sources.iloc[np.where(network, column, 0)]
+        assignments.append(pd.DataFrame({
+            "part_number": cat["part_number"].to_numpy()[sku],
+            "category": category,
+            "current_supplier": cat["supplier"].astype(str).to_numpy()[sku],
+            "supplier": np.where(network, chosen["supplier"].to_numpy(), cat["supplier"].astype(str).to_numpy()[sku]),
+            "origin": np.where(network, chosen["origin"].to_numpy(), cat["origin"].astype(str).to_numpy()[sku]),
+            "tariff_code": np.where(network, chosen["tariff_code"].to_numpy(), cat["tariff_code"].astype(str).to_numpy()[sku]),
+            "share": x[sku, column],
+            "unit_cost": price[sku, column],
+            "current_unit_cost": unit_cost[sku],
+            "units": units[sku] * x[sku, column],
+            "unit_landed_cost": cost[sku, column],
+            "current_unit_landed_cost": own[sku],
+        }))
+        optimized_load = np.bincount(column[network], weights=(units[sku] * x[sku, column])[network], minlength=n_src)
+        by_source.append(cat_sources[["category", "source", "supplier", "origin", "tariff_code"]].assign(
+            capacity_units=capacity, current_units=current_load, optimized_units=optimized_load,
+        ))
+
+    assignments = pd.concat(assignments, ignore_index=True)
+    assignments["annual_landed_cost"] = assignments["units"] * assignments["unit_landed_cost"]
+    assignments["annual_savings"] = assignments["units"] * (assignments["current_unit_landed_cost"] - assignments["unit_landed_cost"])
+    by_source = pd.concat(by_source, ignore_index=True)
+    by_source["utilization"] = by_source["optimized_units"] / by_source["capacity_units"].where(by_source["capacity_units"] > 0)
+    return {
+        "assignments": assignments,
+        "by_source": by_source,
+        "baseline_cost": float((assignments["units"] * assignments["current_unit_landed_cost"]).sum()),
+        "optimized_cost": float(assignments["annual_landed_cost"].sum()),
+        "split_skus": split_skus,
+    }
@@ -0,0 +1,175 @@
+"""
+Tariff scenario engine - scenario × tariff_code rate matrices.
+
+TARIFF_SCENARIOS-style dicts become a dense rate matrix (one row per
+scenario, one column per tariff_code) and the parts catalog collapses to
+annual import value per tariff_code, so annual duty for every scenario is a
+single matrix-vector product. Sweeps over Section 301 levels build
+thousands of scenario rows at once from a base scenario. simulate_tariff_paths
+turns the named scenarios into regimes of one Markov chain per tariff_code
+and prices monthly duty along 100k regime paths.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+RATE_COMPONENTS = ["base", "section_301", "total"]
+PATH_MONTHS = 24
+REGIME_STAY_PROBABILITY = 0.92  # monthly chance the tariff regime holds (~1 policy change a year)
+
+
+def tariff_codes(scenarios, parts=None):
+    """Every tariff_code named by any scenario (and by the parts catalog, if given), in first-seen order."""
+    codes = dict.fromkeys(code for scenario in scenarios.values() for code in scenario["rates"])
+    if parts is not None:
+        codes.update(dict.fromkeys(parts["tariff_code"].astype(str).unique()))
+    return pd.Index(list(codes))
+
+
+def rate_matrix(scenarios, codes, component="total"):
+    """[scenario, tariff_code] duty % for one of RATE_COMPONENTS; codes a scenario omits are 0%."""
+    if component not in RATE_COMPONENTS:
+        raise ValueError(f"unknown rate component {component!r}, expected one of {RATE_COMPONENTS}")
+    rates = np.zeros((len(scenarios), len(codes)))
+    for i, scenario in enumerate(scenarios.values()):
+        for code, parts in scenario["rates"].items():
+            rates[i, codes.get_loc(code)] = parts.get(component, 0.0)
+    return rates
+
+
+def annual_value_by_code(parts, codes):
+    """Annual import value (unit_cost × monthly_demand × 12) summed per tariff_code."""
+    position = codes.get_indexer(parts["tariff_code"].astype(str))
+    value = parts["unit_cost"].to_numpy(dtype=np.float64) * parts["monthly_demand"].to_numpy(dtype=np.float64) * 12
+    known = position >= 0
+    return np.bincount(position[known], weights=value[known], minlength=len(codes))
+
+
+def scenario_duty(scenarios, parts):
+    """Annual duty $ per scenario as one rate-matrix × value-vector product."""
+    codes = tariff_codes(scenarios, parts)
+    duty = rate_matrix(scenarios, codes) @ annual_value_by_code(parts, codes) / 100
+    return pd.Series(duty, index=pd.Index(list(scenarios), name="scenario"), name="annual_duty")
+
+
+def section_301_sweep(base_scenario, codes, axes):
+    """Rate matrix for every combination of Section 301 levels on groups of tariff codes.
+
+    `axes` maps an axis name to (tariff codes on that axis, array of 301 levels
+    %). Codes on an axis get base + level; all other codes keep the base
+    scenario's total. Returns (rates [n_1 × n_2 × ..., code], level grids per axis).
+    """
+    base = rate_matrix({"base": base_scenario}, codes, "base")[0]
+    total = rate_matrix({"base": base_scenario}, codes, "total")[0]
+    grids = np.meshgrid(*[np.asarray(levels, dtype=np.float64) for _, levels in axes.values()], indexing="ij")
+
+    rates = np.broadcast_to(total, (grids[0].size, len(codes))).copy()
+    for (axis_codes, _), grid in zip(axes.values(), grids):
+        on_axis = codes.isin(axis_codes)
+        rates[:, on_axis] = base[on_axis] + grid.reshape(-1, 1)
+    return rates, dict(zip(axes, grids))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STOCHASTIC TARIFF PATHS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def scenario_hash(scenarios, **params):
+    """Stable digest of a scenario definition plus simulation parameters, for cache keys."""
+    payload = json.dumps({"scenarios": scenarios, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def regime_transition_matrix(weights, stay=REGIME_STAY_PROBABILITY):
+    """Monthly Markov transitions: hold with `stay`, otherwise jump to another regime in proportion to its weight."""
+    w = np.asarray(weights, dtype=np.float64)
+    w = w / w.sum()
+    jump = w[None, :] / np.maximum(1 - w[:, None], 1e-12)
+    np.fill_diagonal(jump, 0)
+    return stay * np.eye(len(w)) + (1 - stay) * jump
+
+
+def simulate_regime_paths(transition, start, months, n_paths, seed=42):
+    """[path, month] regime index, every path starting in regime `start`."""
+    rng = np.random.default_rng(seed)
+    cumulative = np.cumsum(transition, axis=1)
+    cumulative[:, -1] = 1.0
+    paths = np.empty((n_paths, months), dtype=np.int8)
+    state = np.full(n_paths, start, dtype=np.int64)
+    for m in range(months):
+        u = rng.random(n_paths)
+        state = (u[:, None] > cumulative[state]).sum(axis=1)
+        paths[:, m] = state
+    return paths
+
+
+def simulate_tariff_paths(
+    scenarios,
+    parts,
+    weights=None,
+    start=None,
+    months=PATH_MONTHS,
+    n_paths=100_000,
+    stay=REGIME_STAY_PROBABILITY,
+    seed=42,
+):
+    """Monthly duty along regime-switching tariff paths, summarized per origin.
+
+    Each scenario is a regime. Every tariff_code runs its own chain: it
+    starts in `start` (the first scenario by default), switches monthly per
+    regime_transition_matrix independently of the other codes, and takes its
+    rate from its current regime's entry for that code. China parts can sit
+    under an escalation while Taiwan parts are back at the base rate.
+    Monthly duty is each code's rate × monthly import value (unit_cost ×
+    monthly_demand) per tariff_code and origin.
+
+    Returns a dict with annual duty statistics per origin (P50 / P90 and 95%
+    VaR over the mean, annualized over the horizon), P10/P50/P90 monthly
+    bands over path totals, and the share of code-months spent in each regime.
+    """
+    keys = list(scenarios)
+    weights = np.ones(len(keys)) if weights is None else np.asarray([weights[k] for k in keys], dtype=np.float64)
+    start = 0 if start is None else keys.index(start)
+
+    codes = tariff_codes(scenarios, parts)
+    origins = pd.Index(parts["origin"].astype(str).unique())
+    code_pos = codes.get_indexer(parts["tariff_code"].astype(str))
+    origin_pos = origins.get_indexer(parts["origin"].astype(str))
+    monthly_value = parts["unit_cost"].to_numpy(dtype=np.float64) * parts["monthly_demand"].to_numpy(dtype=np.float64)
+    value = np.bincount(code_pos * len(origins) + origin_pos, weights=monthly_value,
+                        minlength=len(codes) * len(origins)).reshape(len(codes), len(origins))
+    code_duty = rate_matrix(scenarios, codes) / 100 * value.sum(axis=1)  # [regime, code] monthly duty
+
+    n_regimes, n_codes = len(keys), len(codes)
+    paths = simulate_regime_paths(regime_transition_matrix(weights, stay), start, months, n_paths * n_codes, seed)
+    paths = paths.reshape(n_paths, n_codes, months)
+    # Months each code spends in each regime per path; annual duty is then one contraction over code × regime
+    flat = (np.arange(n_paths * n_codes)[:, None] * n_regimes + paths.reshape(n_paths * n_codes, months)).ravel()
+    counts = np.bincount(flat, minlength=n_paths * n_codes * n_regimes).reshape(n_paths, n_codes, n_regimes)
+    origin_share = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-300)  # [code, origin]
+    code_annual = np.einsum("pcr,rc->pc", counts, code_duty) * (12 / months)  # [path, code]
+    by_origin = code_annual @ origin_share  # [path, origin]
+    total = code_annual.sum(axis=1)
+
+    # Monthly path totals sum each code's regime duty; bands are percentiles across paths per month
+    monthly = np.zeros((n_paths, months))
+    for c in range(n_codes):
+        monthly += code_duty[paths[:, c, :], c]
+    bands = dict(zip((10, 50, 90), np.percentile(monthly, [10, 50, 90], axis=0)))
+
+    def stats(x):
+        p50, p90, p95 = np.percentile(x, [50, 90, 95], axis=0)
+        return {"mean": x.mean(axis=0), "p50": p50, "p90": p90, "var95": p95 - x.mean(axis=0)}
+
+    annual = pd.DataFrame(stats(by_origin), index=origins.rename("origin"))
+    annual.loc["All origins"] = [v for v in stats(total).values()]
+    return {
+        "annual_by_origin": annual.sort_values("mean", ascending=False),
+        "monthly_bands": pd.DataFrame({"month": np.arange(1, months + 1), "p10": bands[10], "p50": bands[50], "p90": bands[90]}),
+        "regime_share": pd.Series(counts.sum(axis=(0, 1)) / paths.size, index=keys, name="share"),
+        "n_paths": n_paths,
+        "months": months,
+    }
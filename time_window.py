@@ -0,0 +1,199 @@
+"""
+Analysis Period engine - time-indexed event logs.
+
+Every dataset that changes over time gets an event log sorted by timestamp.
+A date window is resolved with two binary searches into a contiguous row
+range, so slicing costs O(log n) and returns a view, never a boolean scan.
+"""
+
+import numpy as np
+import pandas as pd
+
+HISTORY_START = "2019-01-01"  # dealer claims and part demand go back to the first install-base model year
+PAYMENT_LAG_DAYS = 21  # mean days from claim close to dealer reimbursement
+
+# SoH thresholds that mark a status change (see battery_passport.SOH_BANDS)
+DEGRADED_SOH = 80
+END_OF_LIFE_SOH = 70
+
+
+class EventLog:
+    """An event frame sorted by one datetime column and sliced by binary search."""
+
+    def __init__(self, events, time_column):
+        times = pd.to_datetime(events[time_column])
+        order = np.argsort(times.to_numpy(), kind="stable")
+        self.time_column = time_column
+        self.frame = events.take(order).reset_index(drop=True)
+        self.frame[time_column] = times.to_numpy()[order]
+        self._times = self.frame[time_column].to_numpy()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _bounds(self, start, end):
+        lo = 0 if start is None else np.searchsorted(self._times, np.datetime64(pd.Timestamp(start).normalize()), side="left")
+        hi = len(self._times) if end is None else np.searchsorted(self._times, np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)), side="left")
+        return int(lo), int(max(hi, lo))
+
+    def window(self, start, end):
+        """Events with start <= time < end + 1 day (both dates inclusive), as a slice."""
+        lo, hi = self._bounds(start, end)
+        return self.frame.iloc[lo:hi]
+
+    def until(self, end):
+        """All events on or before `end`."""
+        return self.window(None, end)
+
+
+def analysis_window(date_range):
+    """Normalize the sidebar date_input value to a (start, end) pair of Timestamps."""
+    dates = list(date_range) if isinstance(date_range, (list, tuple)) else [date_range]
+    start, end = (dates[0], dates[-1]) if dates else (None, None)
+    return pd.Timestamp(start), pd.Timestamp(end)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BATTERY STATUS EVENTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def battery_status_events(batteries, as_of):
+    """Produced / Degraded / End-of-Life events per battery, assuming linear SoH decay since production."""
+    produced = pd.to_datetime(batteries["production_date"]).to_numpy()
+    age_days = (np.datetime64(pd.Timestamp(as_of).normalize()) - produced) / np.timedelta64(1, "D")
+    soh = batteries["state_of_health"].to_numpy(dtype=np.float64)
+    decay_per_day = (100 - soh) / np.maximum(age_days, 1)
+
+    frames = [pd.DataFrame({"event": "Produced", "event_date": produced, "region": batteries["region"].to_numpy()})]
+    for event, threshold in [("Degraded", DEGRADED_SOH), ("End-of-Life", END_OF_LIFE_SOH)]:
+        crossed = soh < threshold
+        days = np.ceil((100 - threshold) / decay_per_day[crossed]).astype("timedelta64[D]")
+        frames.append(pd.DataFrame({"event": event, "event_date": produced[crossed] + days, "region": batteries["region"].to_numpy()[crossed]}))
+
+    events = pd.concat(frames, ignore_index=True)
+    events["event"] = events["event"].astype("category")
+    events["region"] = events["region"].astype(batteries["region"].dtype)
+    return events
+
+
+def fleet_health(battery_log, end, regions):
+    """(batteries in service, share still Healthy) as of `end` for the selected regions."""
+    events = battery_log.until(end)
+    counts = events.loc[events["region"].isin(regions), "event"].value_counts()
+    in_service = int(counts.get("Produced", 0))
+    degraded = int(counts.get("Degraded", 0))  # every End-of-Life battery passed through Degraded first
+    return in_service, (in_service - degraded) / in_service * 100 if in_service else float("nan")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DEALER WARRANTY CLAIMS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _history_days(as_of, history_start):
+    return max((pd.Timestamp(as_of).normalize() - pd.Timestamp(history_start)).days + 1, 1)
+
+
+def dealer_claim_events(dealers, as_of, history_start=HISTORY_START, seed=42):
+    """Individual warranty claims per dealer, drawn around each dealer's snapshot KPIs."""
+    rng = np.random.default_rng(seed)
+    history_days = _history_days(as_of, history_start)
+    annual_rate = dealers["ytd_warranty_volume"].to_numpy(dtype=np.float64)
+    counts = rng.poisson(annual_rate * history_days / 365)
+    dealer_pos = np.repeat(np.arange(len(dealers)), counts)
+    n = len(dealer_pos)
+
+    claim_date = np.datetime64(pd.Timestamp(as_of).normalize()) - rng.integers(0, history_days, n).astype("timedelta64[D]")
+    mean_resolution = dealers["avg_claim_resolution_days"].to_numpy(dtype=np.float64)[dealer_pos]
+    resolution_days = np.maximum(rng.gamma(4.0, mean_resolution / 4.0), 0.5)
+    closed_date = claim_date + np.round(resolution_days).astype("timedelta64[D]")
+    paid_date = closed_date + np.round(rng.exponential(PAYMENT_LAG_DAYS, n)).astype("timedelta64[D]")
+
+    return pd.DataFrame({
+        "dealer_pos": dealer_pos.astype(np.int32),
+        "claim_date": claim_date,
+        "resolution_days": resolution_days,
+        "parts_filled": rng.random(n) < dealers["parts_fill_rate"].to_numpy(dtype=np.float64)[dealer_pos],
+        "reimbursement_usd": rng.gamma(2.0, 340.0, n).round(2),
+        "closed_date": closed_date,
+        "paid_date": paid_date,
+    })
+
+
+def dealer_window_metrics(dealers, claim_log, start, end):
+    """Dealer frame with claim KPIs recomputed from the claims filed in [start, end].
+
+    Replaces parts_fill_rate, avg_claim_resolution_days, open_warranty_claims and
+    pending_reimbursement_usd; adds window_claims. Dealers with no claims in the
+    window get NaN rates and zero counts.
+    """
+    claims = claim_log.window(start, end)
+    pos = claims["dealer_pos"].to_numpy()
+    n_dealers = len(dealers)
+    end_day = np.datetime64(pd.Timestamp(end).normalize())
+
+    n_claims = np.bincount(pos, minlength=n_dealers)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fill_rate = np.bincount(pos, weights=claims["parts_filled"].to_numpy(), minlength=n_dealers) / n_claims
+        resolution = np.bincount(pos, weights=claims["resolution_days"].to_numpy(), minlength=n_dealers) / n_claims
+    open_claims = np.bincount(pos, weights=claims["closed_date"].to_numpy() > end_day, minlength=n_dealers)
+    unpaid = claims["paid_date"].to_numpy() > end_day
+    pending = np.bincount(pos, weights=np.where(unpaid, claims["reimbursement_usd"].to_numpy(), 0), minlength=n_dealers)
+
+    out = dealers.copy(deep=False)
+    out["parts_fill_rate"] = fill_rate
+    out["avg_claim_resolution_days"] = resolution
+    out["open_warranty_claims"] = open_claims.astype(np.int32)
+    out["pending_reimbursement_usd"] = pending
+    out["window_claims"] = n_claims.astype(np.int32)
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PART DEMAND
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def part_demand_events(parts, as_of, history_start=HISTORY_START, seed=42):
+    """Monthly demand buckets per part, Poisson around each part's monthly demand.
+
+    One row per part × month with non-zero demand, stamped with the month's
+    first day and the number of days it covers (the current month runs to
+    `as_of`). A daily table would hold history_days × parts rows.
+    """
+    rng = np.random.default_rng(seed)
+    as_of, history_start = pd.Timestamp(as_of).normalize(), pd.Timestamp(history_start).normalize()
+    months = pd.date_range(history_start.to_period("M").to_timestamp(), as_of, freq="MS")
+    first_day = np.maximum(months, history_start)
+    last_day = np.minimum(months + pd.offsets.MonthEnd(0), as_of)
+    covered = ((last_day - first_day).days + 1).to_numpy()
+    daily_rate = parts["monthly_demand"].to_numpy(dtype=np.float64) / 30
+
+    qty = rng.poisson(covered[:, None] * daily_rate[None, :])
+    month, part = np.nonzero(qty)
+    return pd.DataFrame({
+        "part_pos": part.astype(np.int32),
+        "demand_date": first_day.to_numpy()[month],
+        "days": covered[month].astype(np.int16),
+        "qty": qty[month, part],
+    })
+
+
+def parts_window_metrics(parts, demand_log, start, end):
+    """Parts frame with monthly_demand and days_of_supply recomputed from demand in [start, end].
+
+    Buckets that straddle a window edge count in proportion to their days inside it.
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    demand = demand_log.window(start.to_period("M").to_timestamp(), end)
+    window_days = max((end - start).days + 1, 1)
+    bucket_start = demand["demand_date"].to_numpy()
+    bucket_end = bucket_start + (demand["days"].to_numpy() - 1).astype("timedelta64[D]")
+    inside = (np.minimum(bucket_end, np.datetime64(end)) - np.maximum(bucket_start, np.datetime64(start))) / np.timedelta64(1, "D") + 1
+    share = np.clip(inside, 0, None) / demand["days"].to_numpy()
+    qty = np.bincount(demand["part_pos"].to_numpy(), weights=demand["qty"].to_numpy() * share, minlength=len(parts))
+    daily = qty / window_days
+
+    out = parts.copy(deep=False)
+    out["monthly_demand"] = (daily * 30).round().astype(np.int64)
+    with np.errstate(divide="ignore"):
+        out["days_of_supply"] = np.round(out["total_on_hand"].to_numpy() / daily)
+    return out